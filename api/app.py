@@ -1,19 +1,25 @@
 # api/app.py
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import sys
 from pathlib import Path
 import logging
+import time
 import traceback
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.config import OpenSearchConfig, EmbeddingConfig, ChunkingConfig
+from src.config import OpenSearchConfig, EmbeddingConfig, ChunkingConfig, IngestionConfig, SearchConfig
 from src.opensearch_client import OpenSearchClient
 from src.embeddings import EmbeddingGenerator
-from src.chunker import TextChunker
+from src.embedding_server import RemoteEmbeddingGenerator
+from src.chunker import create_chunker
 from src.ingestion_pipeline import IngestionPipeline
+from src.manifest import IngestionManifest
+from src.search import HybridSearcher
+from src import metrics
+from src.jobs import JobStore, JobManager, STATUS_QUEUED, STATUS_RUNNING
 
 app = Flask(__name__)
 CORS(app)
@@ -26,23 +32,49 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'md', 'markdown', 'doc', 'docx', 'xlsx', 'xls', 
-                      'py', 'java', 'js', 'ts', 'go', 'rb', 'yml', 'yaml', 'json'}
+                      'py', 'java', 'js', 'ts', 'go', 'rb', 'php', 'c', 'cpp', 'cs',
+                      'yml', 'yaml', 'json'}
 
 os_client = None
 embedder = None
 pipeline = None
+manifest = None
+searcher = None
+job_store = None
+job_manager = None
 
 def init_clients():
-    global os_client, embedder, pipeline
+    global os_client, embedder, pipeline, manifest, searcher, job_store, job_manager
     try:
         os_config = OpenSearchConfig()
         embed_config = EmbeddingConfig()
         chunk_config = ChunkingConfig()
+        ingest_config = IngestionConfig()
+        search_config = SearchConfig()
         
         os_client = OpenSearchClient(os_config)
-        embedder = EmbeddingGenerator(embed_config)
-        chunker = TextChunker(chunk_config.max_chunk_size, chunk_config.overlap)
-        pipeline = IngestionPipeline(os_client, embedder, chunker)
+        if embed_config.service_enabled:
+            embedder = RemoteEmbeddingGenerator(embed_config)
+            logger.info(f"Embeddings via le serveur {embed_config.service_socket}")
+        else:
+            embedder = EmbeddingGenerator(embed_config)
+        chunker = create_chunker(chunk_config, embed_config.model_name)
+        manifest = IngestionManifest(Path(ingest_config.manifest_path))
+        pipeline = IngestionPipeline(os_client, embedder, chunker,
+                                     embed_batch_size=embed_config.batch_size,
+                                     workers=ingest_config.workers,
+                                     queue_size=ingest_config.queue_size,
+                                     manifest=manifest,
+                                     dedup=ingest_config.dedup,
+                                     dedup_max_distance=ingest_config.dedup_max_distance)
+        searcher = HybridSearcher.from_config(os_client.client, os_client.index_name,
+                                              embedder, search_config,
+                                              generation=os_client.generation,
+                                              os_config=os_config)
+        job_store = JobStore(Path(ingest_config.jobs_db_path))
+        job_manager = JobManager(job_store, run_ingest_job,
+                                 workers=ingest_config.job_workers,
+                                 lease_seconds=ingest_config.job_lease_seconds)
 
         try:
             index_exists = os_client.client.indices.exists(index=os_client.index_name)
@@ -68,6 +100,9 @@ def init_clients():
             logger.error(traceback.format_exc())
             return False
         
+        # Jobs en attente ou orphelins d'un worker redémarré
+        job_manager.start()
+        
         logger.info("Clients initialized")
         return True
     except Exception as e:
@@ -77,10 +112,22 @@ def init_clients():
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def is_positive_int(value):
+    # bool est un int en Python : true/false refusés ; 10000 = k max de k-NN
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value <= 10000
+
 @app.route('/health')
 def health():
     return jsonify({"status": "healthy"}), 200
 
+@app.route('/metrics')
+def metrics_endpoint():
+    rendered = metrics.render()
+    if rendered is None:
+        return jsonify({"error": "Metrics disabled (METRICS_ENABLED=false or prometheus_client missing)"}), 404
+    payload, content_type = rendered
+    return Response(payload, content_type=content_type)
+
 @app.route('/api/status')
 def status():
     try:
@@ -107,7 +154,13 @@ def status():
             "by_type": [{"type": b['key'], "count": b['doc_count']} 
                        for b in agg_results['aggregations']['by_type']['buckets']],
             "by_extension": [{"ext": b['key'], "count": b['doc_count']} 
-                            for b in agg_results['aggregations']['by_ext']['buckets']]
+                            for b in agg_results['aggregations']['by_ext']['buckets']],
+            # Versions physiques (courante et gardées par INDEX_KEEP_VERSIONS)
+            "indices": os_client.index_sizes(),
+            # Taille avant/après le dernier rebuild (index sortant déjà supprimé)
+            "last_rebuild": os_client.last_rebuild(),
+            "embedding_cache": embedder.cache_stats(),
+            "search_cache": searcher.cache_stats()
         })
     except Exception as e:
         return jsonify({"connected": False, "error": str(e)}), 500
@@ -136,101 +189,152 @@ def upload_files():
 
 @app.route('/api/ingest', methods=['POST'])
 def ingest():
+    """Soumet un job d'ingestion des fichiers uploadés, retourne son id"""
     try:
         data = request.json or {}
         recreate = data.get('recreate', False)
+        incremental = data.get('incremental', False)
         
+        # Fichiers déjà pris par un job en attente ou en cours
+        claimed = claimed_uploads()
         upload_dir = app.config['UPLOAD_FOLDER']
-        files = list(upload_dir.glob('*'))
+        files = sorted(f.name for f in upload_dir.glob('*') if f.is_file() and f.name not in claimed)
         
         if not files:
             return jsonify({"error": "No files to ingest"}), 400
         
-        if recreate:
-            os_client.delete_index()
-            os_client.create_index(dimension=embedder.dimension)
-        
-        total = pipeline.process_directory(upload_dir, batch_size=50)
-        count = os_client.count_documents()
-        
-        cleaned_count = 0
-        for file in upload_dir.iterdir():
-            if file.is_file():
-                try:
-                    file.unlink()
-                    cleaned_count += 1
-                    logger.debug(f"Supprimé: {file.name}")
-                except Exception as e:
-                    logger.warning(f"Impossible de supprimer {file.name}: {e}")
-        
-        logger.info(f"Nettoyage: {cleaned_count} fichiers supprimés")
+        job_id = job_store.submit("ingest", {
+            "files": files,
+            "recreate": recreate,
+            "incremental": incremental
+        })
+        logger.info(f"Job d'ingestion {job_id} soumis ({len(files)} fichiers)")
         
         return jsonify({
             "success": True,
-            "indexed": total,
-            "total_documents": count,
-            "files_processed": len(files),
-            "files_cleaned": cleaned_count
-        })
-
-        #return jsonify({"success": True, "indexed": total, "total_documents": count})
+            "job_id": job_id,
+            "status": STATUS_QUEUED,
+            "files": len(files)
+        }), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def claimed_uploads():
+    """Uploads référencés par un job en attente ou en cours"""
+    return {
+        name
+        for job in job_store.list(limit=1000, statuses=[STATUS_QUEUED, STATUS_RUNNING])
+        for name in job['params'].get('files', [])
+    }
+
+def run_ingest_job(params, report):
+    """Exécute un job d'ingestion (thread du JobManager)"""
+    upload_dir = app.config['UPLOAD_FOLDER']
+    files = [upload_dir / name for name in params['files']]
+    missing = [f.name for f in files if not f.is_file()]
+    files = [f for f in files if f.is_file()]
+    if missing:
+        logger.warning(f"Fichiers absents ignorés: {missing}")
+    
+    # Les uploads sont nettoyés après ingestion : pas de prune des absents
+    if params.get('recreate'):
+        # Reconstruction à côté, l'alias sert l'ancien index jusqu'à la bascule
+        snapshot = manifest.snapshot()
+        manifest.clear()
+        try:
+            with os_client.rebuild_index(dimension=embedder.dimension):
+                with os_client.bulk_load_mode():
+                    total = pipeline.process_files(files, batch_size=50, progress=report)
+        except BaseException:
+            manifest.restore(snapshot)
+            raise
+    else:
+        total = pipeline.process_files(files, batch_size=50,
+                                       incremental=params.get('incremental', False),
+                                       progress=report)
+    stats = dict(pipeline.stats)
+    count = os_client.count_documents()
+    
+    cleaned_count = 0
+    for file in files:
+        try:
+            file.unlink()
+            cleaned_count += 1
+            logger.debug(f"Supprimé: {file.name}")
+        except Exception as e:
+            logger.warning(f"Impossible de supprimer {file.name}: {e}")
+    
+    logger.info(f"Nettoyage: {cleaned_count} fichiers supprimés")
+    
+    return {
+        "success": True,
+        "indexed": total,
+        "total_documents": count,
+        "files_processed": stats.get("files_processed", 0),
+        "files_skipped": stats.get("files_skipped", 0),
+        "files_failed": stats.get("files_failed", 0),
+        "files_missing": missing,
+        "chunks_embedded": stats.get("chunks_embedded", 0),
+        "documents_deleted": stats.get("documents_deleted", 0),
+        "documents_rewritten": stats.get("documents_rewritten", 0),
+        "dedup": stats.get("dedup"),
+        "errors": stats.get("errors", []),
+        "files_cleaned": cleaned_count,
+        "embedding_cache": embedder.cache_stats()
+    }
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs')
+def list_jobs():
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({"jobs": job_store.list(limit=limit)})
+
 @app.route('/api/search', methods=['POST'])
 def search():
     try:
+        started = time.perf_counter()
         data = request.json
         query = data.get('query', '')
         top_k = data.get('top_k', 5)
         
+        ef_search = data.get('ef_search')
+        
         if not query:
             return jsonify({"error": "Empty query"}), 400
+        if not is_positive_int(top_k):
+            return jsonify({"error": "top_k must be a positive integer"}), 400
+        if ef_search is not None and not is_positive_int(ef_search):
+            return jsonify({"error": "ef_search must be a positive integer"}), 400
         
-        query_embedding = embedder.encode(query)
-        
-        search_body = {
-            "size": top_k,
-            "query": {
-                "bool": {
-                    "should": [
-                        {
-                            "script_score": {
-                                "query": {"match_all": {}},
-                                "script": {
-                                    "source": "knn_score",
-                                    "lang": "knn",
-                                    "params": {
-                                        "field": "embedding",
-                                        "query_value": query_embedding,
-                                        "space_type": "l2"
-                                    }
-                                },
-                                "boost": 0.7
-                            }
-                        },
-                        {
-                            "multi_match": {
-                                "query": query,
-                                "fields": ["content^2", "title"],
-                                "boost": 0.3
-                            }
-                        }
-                    ]
-                }
-            },
-            "_source": ["content", "metadata", "title"]
-        }
-        
-        results = os_client.client.search(index=os_client.index_name, body=search_body)
+        try:
+            results = searcher.search(
+                query,
+                top_k=top_k,
+                filters=data.get('filters') or {},
+                ef_search=ef_search,
+                fusion=data.get('fusion')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        hits = [{
-            "score": hit['_score'],
-            "content": hit['_source']['content'][:500],
-            "metadata": hit['_source']['metadata']
-        } for hit in results['hits']['hits']]
+        with metrics.SEARCH_SECONDS.labels("serialize").time():
+            hits = [{
+                "id": result['id'],
+                "score": result['score'],
+                "content": result['source']['content'][:500],
+                "metadata": result['source']['metadata'],
+                "sources": result['source'].get('sources', [])
+            } for result in results]
+            response = jsonify({"query": query, "results": hits, "total": len(hits)})
         
-        return jsonify({"query": query, "results": hits, "total": results['hits']['total']['value']})
+        metrics.SEARCH_SECONDS.labels("total").observe(time.perf_counter() - started)
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -238,8 +342,9 @@ def search():
 def clear_uploads():
     try:
         count = 0
+        claimed = claimed_uploads()
         for file in app.config['UPLOAD_FOLDER'].iterdir():
-            if file.is_file():
+            if file.is_file() and file.name not in claimed:
                 file.unlink()
                 count += 1
         return jsonify({"deleted": count})
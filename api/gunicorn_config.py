@@ -1,5 +1,22 @@
 # api/gunicorn_config.py
 import multiprocessing
+import os
+import secrets
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import EmbeddingConfig, MetricsConfig
+
+# Métriques Prometheus multi-process : posé avant le fork des workers (et
+# avant tout import de prometheus_client), chaque process y écrit ses valeurs
+_metrics_config = MetricsConfig()
+if _metrics_config.enabled:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = _metrics_config.multiproc_dir
 
 bind = "0.0.0.0:8000"
 workers = 2
@@ -9,4 +26,97 @@ timeout = 120
 keepalive = 5
 accesslog = "-"
 errorlog = "-"
-loglevel = "info"
\ No newline at end of file
+loglevel = "info"
+
+_embedding_server = None
+_stopping = threading.Event()
+
+# Relances du serveur d'embeddings : délai doublé à chaque mort rapprochée
+RESTART_BACKOFF_MAX = 60
+RESTART_STABLE_SECONDS = 60
+
+
+def on_starting(server):
+    """EMBEDDING_SERVICE=true : le master lance le serveur d'embeddings
+    avant les workers, qui n'ont plus à charger le modèle, et le relance
+    s'il meurt (OOM, segfault)"""
+    global _embedding_server
+    if _metrics_config.enabled:
+        # Valeurs d'une exécution précédente : on repart de zéro
+        shutil.rmtree(_metrics_config.multiproc_dir, ignore_errors=True)
+        Path(_metrics_config.multiproc_dir).mkdir(parents=True, exist_ok=True)
+
+    config = EmbeddingConfig()
+    if not config.service_enabled:
+        return
+
+    from src.embedding_server import AUTHKEY_ENV
+
+    # Clé aléatoire par démarrage, héritée par le serveur et les workers
+    if not os.environ.get(AUTHKEY_ENV):
+        os.environ[AUTHKEY_ENV] = secrets.token_hex(32)
+
+    _embedding_server = _start_embedding_server(config)
+    server.log.info(f"Serveur d'embeddings lancé (pid {_embedding_server.pid})")
+    threading.Thread(
+        target=_supervise_embedding_server, args=(server, config),
+        name="embedding-server-watcher", daemon=True
+    ).start()
+
+
+def _start_embedding_server(config):
+    from src.embedding_server import run_server
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_server, args=(config.service_socket,), name="embedding-server", daemon=True
+    )
+    process.start()
+    return process
+
+
+def _is_running(process) -> bool:
+    # Le master gunicorn récolte tous ses enfants (waitpid(-1)) : is_alive()
+    # ne voit pas la mort d'un process déjà récolté
+    if process.exitcode is not None:
+        return False
+    try:
+        os.kill(process.pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def _supervise_embedding_server(server, config):
+    """Thread du master : relance le serveur d'embeddings mort"""
+    global _embedding_server
+    backoff = 1
+    started = time.monotonic()
+    while not _stopping.wait(1):
+        if _is_running(_embedding_server):
+            continue
+        if time.monotonic() - started > RESTART_STABLE_SECONDS:
+            backoff = 1
+        server.log.error(
+            f"Serveur d'embeddings arrêté (pid {_embedding_server.pid}, code {_embedding_server.exitcode}), "
+            f"relance dans {backoff}s"
+        )
+        if _stopping.wait(backoff):
+            return
+        _embedding_server = _start_embedding_server(config)
+        started = time.monotonic()
+        backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+        server.log.info(f"Serveur d'embeddings relancé (pid {_embedding_server.pid})")
+
+
+def child_exit(server, worker):
+    """Worker mort : ses gauges "live" ne sont plus agrégées"""
+    if _metrics_config.enabled:
+        from src.metrics import mark_process_dead
+        mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    _stopping.set()
+    if _embedding_server is not None and _is_running(_embedding_server):
+        _embedding_server.terminate()
+        _embedding_server.join(10)
@@ -0,0 +1,141 @@
+# benchmarks/bench_ingest.py
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import CorpusGenerator, FORMATS, SIZES
+from benchmarks.fakes import FakeOpenSearchClient, StubEmbedder
+from dataclasses import replace
+from src.config import ChunkingConfig, IngestionConfig
+from src.chunker import create_chunker
+from src.ingestion_pipeline import IngestionPipeline
+from src.manifest import IngestionManifest
+from src.vector_encoding import VECTOR_ENCODINGS
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    # ru_maxrss en Ko sous Linux, en octets sous macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def run_pass(pipeline: IngestionPipeline, corpus_dir: Path, batch_size: int,
+             incremental: bool) -> dict:
+    start = time.perf_counter()
+    indexed = pipeline.process_directory(corpus_dir, batch_size=batch_size, incremental=incremental)
+    wall = time.perf_counter() - start
+    stats = pipeline.stats
+
+    processed = stats["files_processed"]
+    return {
+        "wall_seconds": round(wall, 3),
+        "files_processed": processed,
+        "files_skipped": stats["files_skipped"],
+        "files_failed": stats["files_failed"],
+        "chunks": stats["chunks_embedded"],
+        "documents_indexed": indexed,
+        "documents_rewritten": stats["documents_rewritten"],
+        "dedup": stats["dedup"],
+        "files_per_s": round(processed / wall, 2) if wall else 0.0,
+        "chunks_per_s": round(stats["chunks_embedded"] / wall, 2) if wall else 0.0,
+        "stage_seconds": {k: round(v, 3) for k, v in stats["stage_seconds"].items()},
+        "errors": stats["errors"][:10]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark d\'ingestion (corpus synthétique, sans cluster ni GPU)')
+    parser.add_argument('--files', type=int, default=140, help='Nombre de fichiers générés')
+    parser.add_argument('--size', choices=sorted(SIZES), default='medium', help='Taille des fichiers')
+    parser.add_argument('--formats', default=",".join(FORMATS), help='Formats générés (séparés par des virgules)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed du corpus')
+    parser.add_argument('--corpus-dir', type=str, default=None, help='Répertoire du corpus (défaut: temporaire)')
+    parser.add_argument('--workers', type=int, default=None, help='Process de parsing (défaut: INGEST_WORKERS)')
+    parser.add_argument('--batch-size', type=int, default=50, help='Taille des batchs d\'indexation')
+    parser.add_argument('--embed-batch-size', type=int, default=64, help='Taille des batchs d\'embedding')
+    parser.add_argument('--embed-ms', type=float, default=0.0, help='Coût simulé du modèle par texte (ms)')
+    parser.add_argument('--bulk-latency-ms', type=float, default=0.0, help='Latence simulée par requête bulk (ms)')
+    parser.add_argument('--dedup', choices=['off', 'exact', 'near'], default='off',
+                        help='Déduplication des chunks')
+    parser.add_argument('--vector-encoding', choices=VECTOR_ENCODINGS, default='float',
+                        help='Encodage des vecteurs dans le payload bulk')
+    parser.add_argument('--chunking', choices=['words', 'tokens'], default='words',
+                        help='Mode de chunking (tokens nécessite le tokenizer en local)')
+    parser.add_argument('--incremental-pass', action='store_true',
+                        help='Second passage incrémental (tous les fichiers inchangés)')
+    parser.add_argument('--output', type=str, default=None, help='Fichier JSON du rapport (défaut: stdout)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+
+    with tempfile.TemporaryDirectory(prefix="docvector-bench-") as tmp:
+        corpus_dir = Path(args.corpus_dir or Path(tmp) / "corpus")
+        generation_start = time.perf_counter()
+        corpus = CorpusGenerator(seed=args.seed, size=args.size).generate(corpus_dir, args.files, formats)
+        corpus["generation_seconds"] = round(time.perf_counter() - generation_start, 3)
+
+        ingest_config = IngestionConfig()
+        chunker = create_chunker(replace(ChunkingConfig(), mode=args.chunking), "all-MiniLM-L6-v2")
+        embedder = StubEmbedder(seconds_per_text=args.embed_ms / 1000)
+        os_client = FakeOpenSearchClient(bulk_latency=args.bulk_latency_ms / 1000,
+                                         vector_encoding=args.vector_encoding)
+        pipeline = IngestionPipeline(
+            os_client, embedder, chunker,
+            embed_batch_size=args.embed_batch_size,
+            workers=args.workers or ingest_config.workers,
+            queue_size=ingest_config.queue_size,
+            manifest=IngestionManifest(Path(tmp) / "manifest.json"),
+            dedup=args.dedup
+        )
+
+        report = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "files": args.files, "size": args.size, "formats": list(formats), "seed": args.seed,
+                "workers": pipeline.workers, "batch_size": args.batch_size,
+                "embed_batch_size": args.embed_batch_size, "embed_ms": args.embed_ms,
+                "bulk_latency_ms": args.bulk_latency_ms, "chunking": args.chunking,
+                "vector_encoding": args.vector_encoding, "dedup": args.dedup
+            },
+            "corpus": corpus,
+            "full": run_pass(pipeline, corpus_dir, args.batch_size, incremental=False)
+        }
+        report["bulk"] = {"requests": os_client.bulk_requests, "bytes": os_client.bytes_sent}
+        if args.incremental_pass:
+            report["incremental"] = run_pass(pipeline, corpus_dir, args.batch_size, incremental=True)
+
+        report["peak_rss_mb"] = peak_rss_mb()
+        report["children_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+        print(f"Rapport écrit dans {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
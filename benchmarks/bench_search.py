@@ -0,0 +1,428 @@
+# benchmarks/bench_search.py
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.bench_ingest import git_commit
+from benchmarks.corpus import CorpusGenerator, SIZES
+from benchmarks.fakes import FakeOpenSearchClient, LocalSearchClient, StubEmbedder
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import product
+from src.config import ChunkingConfig, EmbeddingConfig, OpenSearchConfig, SearchConfig
+from src.chunker import create_chunker
+from src.ingestion_pipeline import IngestionPipeline
+from src.manifest import IngestionManifest
+from src.search import FILTER_FIELDS, HybridSearcher, knn_query
+from src.vector_encoding import VECTOR_ENCODINGS, encode_vector
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import re
+import tempfile
+import threading
+import time
+import numpy as np
+
+
+# --- Jeu de requêtes ---------------------------------------------------------
+
+def load_queries(path: Path) -> List[Dict]:
+    """Requêtes étiquetées : liste JSON ou JSONL de
+    {"query": "...", "relevant": ["chunk_id", ...], "filters": {...}}
+    ("relevant" et "filters" optionnels)
+    """
+    text = Path(path).read_text(encoding='utf-8').strip()
+    if text.startswith("["):
+        queries = json.loads(text)
+    else:
+        queries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    for query in queries:
+        if not query.get("query"):
+            raise ValueError(f"Requête sans texte: {query}")
+    return queries
+
+
+def synthetic_queries(documents: Dict[str, Dict], count: int, seed: int = 42) -> List[Dict]:
+    """Requêtes tirées du corpus : une fenêtre de mots d'un chunk, étiquetée par ce chunk"""
+    rng = random.Random(seed)
+    ids = sorted(documents)
+    queries = []
+    for chunk_id in rng.sample(ids, min(count, len(ids))):
+        words = re.findall(r"\w+", documents[chunk_id].get("content") or "")
+        if len(words) < 4:
+            continue
+        length = min(len(words), rng.randint(4, 10))
+        start = rng.randint(0, len(words) - length)
+        queries.append({"query": " ".join(words[start:start + length]), "relevant": [chunk_id]})
+    return queries
+
+
+# --- Vérité terrain exacte -----------------------------------------------------
+
+def corpus_matrix(documents: Dict[str, Dict], embedder, batch_size: int = 64):
+    """(ids, matrice normalisée) du contenu ré-encodé en float32
+
+    Les vecteurs stockés ne servent pas : quantifiés (fp16, byte) ou exclus
+    du _source, ils masqueraient la perte mesurée.
+    """
+    ids = sorted(documents)
+    matrix = np.empty((len(ids), embedder.dimension), dtype=np.float32)
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+        matrix[i:i + len(batch)] = embedder.encode_batch(
+            [documents[chunk_id].get("content") or "" for chunk_id in batch]
+        )
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return ids, matrix
+
+
+def exact_neighbors(ids: List[str], matrix: np.ndarray, documents: Dict[str, Dict],
+                    queries: List[Dict], embedder, k: int) -> List[List[str]]:
+    """Top-k exact par force brute (cosinus), mêmes filtres que la recherche"""
+    vectors = np.asarray(embedder.encode_batch([q["query"] for q in queries]), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = vectors @ matrix.T
+
+    neighbors = []
+    for row, query in zip(scores, queries):
+        mask = np.ones(len(ids), dtype=bool)
+        for name, value in (query.get("filters") or {}).items():
+            values = value if isinstance(value, list) else [value]
+            key = FILTER_FIELDS[name].split(".", 1)[1]
+            mask &= np.array([documents[i]["metadata"].get(key) in values for i in ids], dtype=bool)
+        candidates = np.flatnonzero(mask)
+        top = candidates[np.argsort(-row[candidates], kind="stable")[:k]]
+        neighbors.append([ids[position] for position in top])
+    return neighbors
+
+
+# --- Cibles --------------------------------------------------------------------
+
+class SearcherTarget:
+    """Recherche directe sur la couche de recherche (HybridSearcher, sans cache)"""
+
+    def __init__(self, searcher: HybridSearcher, mode: str):
+        self.searcher = searcher
+        self.mode = mode
+
+    def configure(self, ef_search: Optional[int], fusion: Optional[str],
+                  vector_weight: Optional[float]):
+        self.ef_search = ef_search
+        self.fusion = fusion
+        if vector_weight is not None:
+            self.searcher.vector_weight = vector_weight
+            self.searcher.keyword_weight = round(1 - vector_weight, 6)
+
+    def search(self, query: Dict, top_k: int) -> List[str]:
+        if self.mode == "vector":
+            vector = encode_vector(self.searcher.embedder.encode(query["query"]),
+                                   self.searcher.vector_encoding, self.searcher.vector_decimals)
+            body = {
+                "size": top_k,
+                "query": knn_query(vector, k=top_k, ef_search=self.ef_search or self.searcher.ef_search,
+                                   filters=query.get("filters")),
+                "_source": False
+            }
+            response = self.searcher.client.search(index=self.searcher.index_name, body=body)
+            return [hit["_id"] for hit in response["hits"]["hits"]]
+
+        results = self.searcher.search(query["query"], top_k=top_k, filters=query.get("filters"),
+                                       ef_search=self.ef_search, fusion=self.fusion, source=["metadata"])
+        return [result["id"] for result in results]
+
+
+class ApiTarget:
+    """POST /api/search (une session HTTP par thread)"""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        import requests
+        self._requests = requests
+        self.url = url.rstrip("/") + "/api/search"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def configure(self, ef_search: Optional[int], fusion: Optional[str],
+                  vector_weight: Optional[float]):
+        self.ef_search = ef_search
+        self.fusion = fusion
+
+    def search(self, query: Dict, top_k: int) -> List[str]:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        body = {"query": query["query"], "top_k": top_k, "filters": query.get("filters") or {}}
+        if self.ef_search:
+            body["ef_search"] = self.ef_search
+        if self.fusion:
+            body["fusion"] = self.fusion
+        response = session.post(self.url, json=body, timeout=self.timeout)
+        response.raise_for_status()
+        return [hit["id"] for hit in response.json()["results"]]
+
+
+# --- Charge ----------------------------------------------------------------------
+
+def run_load(search: Callable[[Dict], List[str]], queries: List[Dict], concurrency: int,
+             qps: float, repeat: int = 1) -> Dict:
+    """Exécute les requêtes sur concurrency threads, au débit qps (0 = au plus vite)
+
+    Avec qps, chaque requête a une heure d'envoi planifiée (boucle ouverte) :
+    response_ms inclut l'attente derrière les requêtes précédentes, que
+    service_ms ignore.
+    """
+    schedule = [query for _ in range(repeat) for query in queries]
+    results: List[Optional[List[str]]] = [None] * len(queries)
+    service: List[float] = []
+    response: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def task(position: int, query: Dict):
+        planned = start + position / qps if qps else time.perf_counter()
+        delay = planned - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+        try:
+            ids = search(query)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        done = time.perf_counter()
+        with lock:
+            service.append((done - sent) * 1000)
+            response.append((done - planned) * 1000)
+            if position < len(queries):
+                results[position] = ids
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(task, i, q) for i, q in enumerate(schedule)]:
+            future.result()
+    wall = time.perf_counter() - start
+
+    report = {
+        "requests": len(schedule),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_seconds": round(wall, 3),
+        "throughput_qps": round(len(service) / wall, 2) if wall else 0.0,
+        "service_ms": latency_summary(service)
+    }
+    if qps:
+        report["response_ms"] = latency_summary(response)
+    report["results"] = results
+    return report
+
+
+def latency_summary(latencies: List[float]) -> Dict:
+    if not latencies:
+        return {}
+    values = np.asarray(latencies)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "mean": round(float(values.mean()), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+
+def quality(results: List[Optional[List[str]]], exact: List[List[str]],
+            queries: List[Dict], k: int) -> Dict:
+    """recall@k contre la force brute ; MRR sur "relevant" (à défaut le plus proche voisin exact)"""
+    recalls, reciprocal_ranks = [], []
+    for returned, truth, query in zip(results, exact, queries):
+        if returned is None:
+            continue
+        if truth:
+            recalls.append(len(set(returned[:k]) & set(truth[:k])) / len(truth[:k]))
+        relevant = set(query.get("relevant") or truth[:1])
+        rank = next((r for r, chunk_id in enumerate(returned, 1) if chunk_id in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    return {
+        f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else None,
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4) if reciprocal_ranks else None,
+        "evaluated": len(reciprocal_ranks)
+    }
+
+
+# --- Construction des cibles ---------------------------------------------------
+
+def build_embedder(kind: str):
+    if kind == "stub":
+        return StubEmbedder()
+    from src.embeddings import EmbeddingGenerator
+    # Sans cache disque : la latence mesurée inclut l'encodage de la requête
+    return EmbeddingGenerator(replace(EmbeddingConfig(), cache_enabled=False))
+
+
+def local_documents(args, embedder, tmp: Path):
+    """Corpus synthétique ingéré dans le client en mémoire"""
+    corpus_dir = Path(args.corpus_dir or tmp / "corpus")
+    corpus = CorpusGenerator(seed=args.seed, size=args.size).generate(corpus_dir, args.files)
+    os_client = FakeOpenSearchClient(store=True, vector_encoding=args.vector_encoding)
+    pipeline = IngestionPipeline(
+        os_client, embedder,
+        create_chunker(replace(ChunkingConfig(), mode="words"), "all-MiniLM-L6-v2"),
+        workers=1, manifest=IngestionManifest(tmp / "manifest.json")
+    )
+    pipeline.process_directory(corpus_dir, batch_size=100)
+    return os_client.documents, corpus
+
+
+def cluster_documents(client, index_name: str) -> Dict[str, Dict]:
+    """Documents de l'index (chunk_id -> contenu, metadata)"""
+    from opensearchpy import helpers
+    documents = {}
+    for hit in helpers.scan(client, index=index_name, query={"query": {"match_all": {}}},
+                            _source=["content", "metadata"]):
+        documents[hit["_id"]] = hit["_source"]
+    return documents
+
+
+def parse_list(value: Optional[str], cast) -> List:
+    if not value:
+        return [None]
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de recherche : latence, débit, recall@k et MRR')
+    parser.add_argument('--target', choices=['local', 'opensearch', 'api'], default='local',
+                        help='local: corpus synthétique en mémoire ; opensearch: HybridSearcher sur le cluster ; '
+                             'api: POST /api/search (vérité terrain lue sur le cluster)')
+    parser.add_argument('--url', type=str, default='http://localhost:5000', help='URL de l\'API (--target api)')
+    parser.add_argument('--mode', choices=['hybrid', 'vector'], default='hybrid',
+                        help='hybrid (fusion) ou vector (k-NN seul, recall de l\'ANN)')
+    parser.add_argument('--queries', type=str, default=None,
+                        help='Jeu de requêtes JSON/JSONL (défaut: tiré du corpus)')
+    parser.add_argument('--num-queries', type=int, default=200, help='Requêtes tirées du corpus')
+    parser.add_argument('--save-queries', type=str, default=None, help='Écrit le jeu de requêtes utilisé (JSONL)')
+    parser.add_argument('--top-k', type=int, default=10, help='k de recall@k')
+    parser.add_argument('--concurrency', type=int, default=4, help='Requêtes simultanées')
+    parser.add_argument('--qps', type=float, default=0.0, help='Débit cible (0 = au plus vite)')
+    parser.add_argument('--repeat', type=int, default=1, help='Passages sur le jeu de requêtes')
+    parser.add_argument('--warmup', type=int, default=10, help='Requêtes de chauffe non mesurées')
+    parser.add_argument('--ef-search', type=str, default=None, help='Valeurs d\'ef_search à balayer (ex: 50,100,200)')
+    parser.add_argument('--fusion', type=str, default=None, help='Fusions à balayer (ex: rrf,minmax)')
+    parser.add_argument('--vector-weight', type=str, default=None,
+                        help='Poids vectoriels à balayer, keyword = 1 - poids (ex: 0.5,0.7,0.9)')
+    parser.add_argument('--embedder', choices=['stub', 'model'], default=None,
+                        help='stub (hash, sans modèle) ou model (défaut: stub en local, model sinon)')
+    parser.add_argument('--vector-encoding', choices=VECTOR_ENCODINGS, default='float',
+                        help='Encodage des vecteurs du corpus local (sur le cluster : OPENSEARCH_VECTOR_ENCODING)')
+    parser.add_argument('--files', type=int, default=70, help='Fichiers du corpus local')
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='Taille des fichiers du corpus local')
+    parser.add_argument('--seed', type=int, default=42, help='Seed du corpus et des requêtes')
+    parser.add_argument('--corpus-dir', type=str, default=None, help='Répertoire du corpus local')
+    parser.add_argument('--output', type=str, default=None, help='Fichier JSON du rapport (défaut: stdout)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.target == 'api' and args.mode == 'vector':
+        parser.error("--mode vector nécessite --target local ou opensearch")
+    if args.target == 'api' and args.vector_weight:
+        parser.error("--vector-weight n'est pas exposé par l'API (SEARCH_VECTOR_WEIGHT côté serveur)")
+
+    embedder = build_embedder(args.embedder or ("stub" if args.target == "local" else "model"))
+    search_config = SearchConfig()
+
+    with tempfile.TemporaryDirectory(prefix="docvector-bench-") as tmp:
+        corpus = None
+        if args.target == "local":
+            os_config = replace(OpenSearchConfig(), vector_encoding=args.vector_encoding, vector_decimals=0)
+            documents, corpus = local_documents(args, embedder, Path(tmp))
+            client, index_name = LocalSearchClient(documents), "benchmark"
+        else:
+            from src.opensearch_client import OpenSearchClient
+            os_config = OpenSearchConfig()
+            os_client = OpenSearchClient(os_config)
+            client, index_name = os_client.client, os_client.index_name
+            documents = cluster_documents(client, index_name)
+
+        queries = load_queries(Path(args.queries)) if args.queries else \
+            synthetic_queries(documents, args.num_queries, args.seed)
+        if not queries:
+            raise SystemExit("Aucune requête à exécuter")
+        if args.save_queries:
+            Path(args.save_queries).write_text(
+                "".join(json.dumps(q, ensure_ascii=False) + "\n" for q in queries), encoding='utf-8'
+            )
+
+        ground_truth_start = time.perf_counter()
+        ids, matrix = corpus_matrix(documents, embedder)
+        exact = exact_neighbors(ids, matrix, documents, queries, embedder, args.top_k)
+        ground_truth_seconds = time.perf_counter() - ground_truth_start
+
+        if args.target == "api":
+            target = ApiTarget(args.url)
+        else:
+            # Sans cache de résultats : chaque requête va jusqu'à l'index
+            target = SearcherTarget(
+                HybridSearcher.from_config(client, index_name, embedder, search_config,
+                                           os_config=os_config), args.mode
+            )
+
+        runs = []
+        for ef_search, fusion, vector_weight in product(
+                parse_list(args.ef_search, int), parse_list(args.fusion, str),
+                parse_list(args.vector_weight, float)):
+            target.configure(ef_search, fusion, vector_weight)
+            search = lambda query: target.search(query, args.top_k)
+            for query in queries[:args.warmup]:
+                search(query)
+
+            load = run_load(search, queries, args.concurrency, args.qps, args.repeat)
+            run = {
+                "params": {
+                    "ef_search": ef_search or search_config.ef_search,
+                    "fusion": None if args.mode == "vector" else fusion or search_config.fusion,
+                    "vector_weight": vector_weight
+                },
+                **quality(load.pop("results"), exact, queries, args.top_k),
+                **load
+            }
+            runs.append(run)
+            print(
+                f"ef_search={run['params']['ef_search']} fusion={run['params']['fusion']} "
+                f"vector_weight={vector_weight}: p50={run['service_ms'].get('p50')} ms "
+                f"p99={run['service_ms'].get('p99')} ms, {run['throughput_qps']} req/s, "
+                f"recall@{args.top_k}={run[f'recall@{args.top_k}']}, mrr={run['mrr']}",
+                file=sys.stderr
+            )
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "target": args.target, "mode": args.mode, "top_k": args.top_k,
+            "concurrency": args.concurrency, "qps": args.qps, "repeat": args.repeat,
+            "embedder": type(embedder).__name__, "vector_encoding": os_config.vector_encoding, "queries": len(queries),
+            "labelled": sum(1 for q in queries if q.get("relevant"))
+        },
+        "corpus": corpus,
+        "documents": len(documents),
+        "ground_truth_seconds": round(ground_truth_seconds, 3),
+        "runs": runs
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding='utf-8')
+        print(f"Rapport écrit dans {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
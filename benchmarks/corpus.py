@@ -0,0 +1,179 @@
+# benchmarks/corpus.py
+from pathlib import Path
+from typing import Dict, List
+import random
+
+import docx
+import openpyxl
+
+FORMATS = ("md", "py", "yaml", "jenkinsfile", "docx", "xlsx", "pdf")
+
+WORDS = (
+    "deploy pipeline cluster index shard replica container image registry build release "
+    "rollback secret token certificate proxy gateway service endpoint latency throughput "
+    "monitoring alert dashboard backup restore migration schema query cache worker queue "
+    "ansible playbook kubernetes helm chart terraform module variable output jenkins stage "
+    "agent artifact nexus docker compose network volume ingress namespace configmap opensearch "
+    "embedding vector chunk document search ranking relevance manual procedure incident"
+).split()
+
+# Tailles de fichier (unités : sections, fonctions, lignes, pages)
+SIZES = {"small": 4, "medium": 16, "large": 64}
+
+
+class CorpusGenerator:
+    """Corpus synthétique reproductible (même seed -> mêmes fichiers)"""
+
+    def __init__(self, seed: int = 42, size: str = "medium"):
+        self.rng = random.Random(seed)
+        self.units = SIZES[size]
+
+    def generate(self, output_dir: Path, files: int, formats=FORMATS) -> Dict:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        summary = {"files": 0, "bytes": 0, "by_format": {}}
+
+        for i in range(files):
+            fmt = formats[i % len(formats)]
+            path = getattr(self, f"_write_{fmt}")(output_dir, i)
+            size = path.stat().st_size
+            entry = summary["by_format"].setdefault(fmt, {"files": 0, "bytes": 0})
+            entry["files"] += 1
+            entry["bytes"] += size
+            summary["files"] += 1
+            summary["bytes"] += size
+
+        return summary
+
+    def _sentence(self, min_words: int = 8, max_words: int = 20) -> str:
+        words = self.rng.choices(WORDS, k=self.rng.randint(min_words, max_words))
+        return " ".join(words).capitalize() + "."
+
+    def _paragraph(self, sentences: int = 5) -> str:
+        return " ".join(self._sentence() for _ in range(sentences))
+
+    def _identifier(self) -> str:
+        return "_".join(self.rng.choices(WORDS, k=2))
+
+    def _write_md(self, output_dir: Path, i: int) -> Path:
+        lines = [f"# Guide {i}: {self._sentence(3, 6)}", "", self._paragraph()]
+        for section in range(self.units):
+            lines += ["", f"## Section {section} {self.rng.choice(WORDS)}", "", self._paragraph()]
+            lines += ["", "```bash", f"kubectl rollout restart deployment/{self._identifier()}", "```"]
+        path = output_dir / f"guide_{i}.md"
+        path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        return path
+
+    def _write_py(self, output_dir: Path, i: int) -> Path:
+        lines = ['"""' + self._sentence() + '"""', "import os", "import logging", "",
+                 "logger = logging.getLogger(__name__)", ""]
+        for cls in range(max(1, self.units // 4)):
+            lines += [f"class Service{cls}:", f'    """{self._sentence()}"""', ""]
+            for method in range(4):
+                name = self._identifier()
+                lines += [
+                    f"    def {name}_{method}(self, value):",
+                    f'        """{self._sentence()}"""',
+                    f"        result = value * {self.rng.randint(2, 9)}",
+                    f"        logger.info(f\"{name}: {{result}}\")",
+                    "        return result",
+                    ""
+                ]
+        for func in range(self.units):
+            lines += [f"def {self._identifier()}_{func}(config):",
+                      f"    # {self._sentence()}",
+                      "    return {key: value for key, value in config.items() if value}", ""]
+        path = output_dir / f"module_{i}.py"
+        path.write_text("\n".join(lines), encoding='utf-8')
+        return path
+
+    def _write_yaml(self, output_dir: Path, i: int) -> Path:
+        lines = ["- hosts: all", "  become: true", "  tasks:"]
+        for task in range(self.units * 2):
+            lines += [
+                f"    - name: {self._sentence(3, 8)}",
+                "      ansible.builtin.package:",
+                f"        name: {self.rng.choice(WORDS)}",
+                "        state: present",
+            ]
+        path = output_dir / f"playbook_{i}.yml"
+        path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        return path
+
+    def _write_jenkinsfile(self, output_dir: Path, i: int) -> Path:
+        lines = ["pipeline {", "    agent any", "    stages {"]
+        for stage in range(max(2, self.units // 2)):
+            lines += [
+                f"        stage('{self.rng.choice(WORDS).capitalize()} {stage}') {{",
+                f"            steps {{ sh 'make {self.rng.choice(WORDS)}' }}",
+                "        }",
+            ]
+        lines += ["    }", "}"]
+        directory = output_dir / f"job_{i}"
+        directory.mkdir(exist_ok=True)
+        path = directory / "Jenkinsfile"
+        path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        return path
+
+    def _write_docx(self, output_dir: Path, i: int) -> Path:
+        document = docx.Document()
+        document.add_heading(f"Procedure {i}", level=1)
+        for _ in range(self.units * 2):
+            document.add_paragraph(self._paragraph(3))
+        path = output_dir / f"procedure_{i}.docx"
+        document.save(str(path))
+        return path
+
+    def _write_xlsx(self, output_dir: Path, i: int) -> Path:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("Inventory")
+        sheet.append(["Host", "Service", "Version", "Owner", "Notes"])
+        for row in range(self.units * 25):
+            sheet.append([
+                f"srv-{row:04d}", self.rng.choice(WORDS), f"{self.rng.randint(1, 9)}.{self.rng.randint(0, 20)}",
+                self.rng.choice(WORDS), self._sentence(4, 10)
+            ])
+        path = output_dir / f"inventory_{i}.xlsx"
+        workbook.save(str(path))
+        return path
+
+    def _write_pdf(self, output_dir: Path, i: int) -> Path:
+        pages = [[self._sentence(6, 12) for _ in range(40)] for _ in range(self.units)]
+        path = output_dir / f"manual_{i}.pdf"
+        path.write_bytes(minimal_pdf(pages))
+        return path
+
+
+def minimal_pdf(pages: List[List[str]]) -> bytes:
+    """PDF texte minimal (Helvetica, une ligne par entrée) sans dépendance"""
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    count = len(pages)
+    font_id = 3 + 2 * count
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{3 + 2 * p} 0 R" for p in range(count)), count)).encode(),
+    ]
+    for p, lines in enumerate(pages):
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * p} 0 R >>"
+        ).encode())
+        stream = "".join(
+            f"BT /F1 9 Tf 40 {760 - n * 18} Td ({escape(line)}) Tj ET\n" for n, line in enumerate(lines)
+        ).encode('latin-1', errors='replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"endstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer << /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return output
@@ -0,0 +1,238 @@
+# benchmarks/fakes.py
+from typing import Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import re
+import time
+import numpy as np
+
+from src.vector_encoding import check_encoding, encode_vectors
+
+
+class StubEmbedder:
+    """Embedder déterministe sans modèle (vecteur dérivé du hash du texte)
+
+    seconds_per_text simule le coût du modèle pour les scénarios où
+    l'embedding doit rester le goulot d'étranglement.
+    """
+
+    def __init__(self, dimension: int = 384, seconds_per_text: float = 0.0):
+        self._dimension = dimension
+        self.seconds_per_text = seconds_per_text
+        self.texts = 0
+        self.calls = 0
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            return self.encode_batch([texts])[0].tolist()
+        return self.encode_batch(texts).tolist()
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        self.texts += len(texts)
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+
+        vectors = np.empty((len(texts), self._dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+            vectors[i] = np.random.default_rng(seed).standard_normal(self._dimension, dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+    def cache_stats(self) -> Optional[dict]:
+        return None
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+
+class FakeOpenSearchClient:
+    """OpenSearchClient en mémoire : même interface d'écriture que le vrai
+
+    Les documents sont sérialisés comme par le client bulk (coût CPU
+    réaliste) puis comptés ; store=True les garde pour les benchmarks de
+    recherche. bulk_latency simule l'aller-retour par requête bulk.
+    """
+
+    def __init__(self, index_name: str = "benchmark", chunk_size: int = 500,
+                 bulk_latency: float = 0.0, store: bool = False, vector_encoding: str = "float"):
+        self.index_name = index_name
+        self.write_index = index_name
+        self.chunk_size = chunk_size
+        self.bulk_latency = bulk_latency
+        self.store = store
+        self.vector_encoding = check_encoding(vector_encoding)
+        self.documents: Dict[str, Dict] = {}
+        self.indexed = 0
+        self.deleted = 0
+        self.bulk_requests = 0
+        self.bytes_sent = 0
+
+    def create_index(self, dimension: int = 384):
+        return True
+
+    def encode_vectors(self, vectors) -> List[List]:
+        return encode_vectors(vectors, self.vector_encoding)
+
+    def bulk_index(self, documents: List[Dict]) -> dict:
+        return self.stream_index(documents)
+
+    def stream_index(self, documents: Iterable[Dict],
+                     on_result: Optional[Callable[[bool, str], None]] = None) -> dict:
+        result = {"success": 0, "failed": 0, "failed_ids": [], "retried": 0}
+        chunk = []
+        for doc in documents:
+            chunk.append(doc)
+            if len(chunk) >= self.chunk_size:
+                self._send(chunk, result, on_result)
+                chunk = []
+        if chunk:
+            self._send(chunk, result, on_result)
+        return result
+
+    def _send(self, chunk: List[Dict], result: Dict, on_result):
+        payload = "".join(
+            json.dumps({"index": {"_index": self.write_index, "_id": doc["chunk_id"]}}, separators=(",", ":"))
+            + "\n" + json.dumps(doc, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for doc in chunk
+        )
+        self.bytes_sent += len(payload.encode('utf-8'))
+        self.bulk_requests += 1
+        if self.bulk_latency:
+            time.sleep(self.bulk_latency)
+
+        for doc in chunk:
+            if self.store:
+                self.documents[doc["chunk_id"]] = doc
+            self.indexed += 1
+            result["success"] += 1
+            if on_result is not None:
+                on_result(True, doc["chunk_id"])
+
+    def get_documents(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        return {
+            chunk_id: {k: v for k, v in self.documents[chunk_id].items() if k != "embedding"}
+            for chunk_id in chunk_ids if chunk_id in self.documents
+        }
+
+    def delete_documents(self, chunk_ids: List[str]) -> int:
+        deleted = 0
+        for chunk_id in chunk_ids:
+            if self.documents.pop(chunk_id, None) is not None or not self.store:
+                deleted += 1
+        self.deleted += deleted
+        return deleted
+
+    def count_documents(self) -> int:
+        return len(self.documents) if self.store else self.indexed - self.deleted
+
+
+class LocalSearchClient:
+    """Stand-in de recherche en mémoire (msearch/search) pour HybridSearcher
+
+    Construit sur les documents d'un FakeOpenSearchClient(store=True).
+    Jambe k-NN : produit scalaire exact NumPy (cosinesimil, score
+    (1 + cos) / 2 comme OpenSearch) ; jambe mots-clés : BM25 sur les
+    champs du multi_match (best_fields). ef_search est ignoré : la jambe
+    vectorielle est exacte, ce qui isole le coût et l'effet de la fusion.
+    """
+
+    def __init__(self, documents: Dict[str, Dict], k1: float = 1.2, b: float = 0.75):
+        self.ids = list(documents)
+        self.sources = [documents[chunk_id] for chunk_id in self.ids]
+        self.k1 = k1
+        self.b = b
+        self.searches = 0
+
+        self.matrix = np.asarray([doc["embedding"] for doc in self.sources], dtype=np.float32)
+        if len(self.ids):
+            self.matrix /= np.maximum(np.linalg.norm(self.matrix, axis=1, keepdims=True), 1e-12)
+
+        # Index inversé par champ : terme -> {position du document: tf}
+        self._postings: Dict[str, Dict[str, Dict[int, int]]] = {}
+        self._lengths: Dict[str, np.ndarray] = {}
+        for field in ("content", "title"):
+            postings: Dict[str, Dict[int, int]] = {}
+            lengths = np.zeros(len(self.ids), dtype=np.float32)
+            for position, doc in enumerate(self.sources):
+                terms = _tokenize(doc.get(field) or "")
+                lengths[position] = len(terms)
+                for term in terms:
+                    entry = postings.setdefault(term, {})
+                    entry[position] = entry.get(position, 0) + 1
+            self._postings[field] = postings
+            self._lengths[field] = lengths
+
+    def msearch(self, body: List[Dict], **kwargs) -> Dict:
+        return {"responses": [self._execute(query) for query in body[1::2]]}
+
+    def search(self, index: Optional[str] = None, body: Optional[Dict] = None, **kwargs) -> Dict:
+        return self._execute(body or {})
+
+    def _execute(self, body: Dict) -> Dict:
+        self.searches += 1
+        query = body.get("query", {})
+        size = body.get("size", 10)
+
+        if "knn" in query:
+            params = next(iter(query["knn"].values()))
+            mask = self._mask(params.get("filter", {}).get("bool", {}).get("filter", []))
+            vector = np.asarray(params["vector"], dtype=np.float32)
+            vector /= max(float(np.linalg.norm(vector)), 1e-12)
+            scores = (1.0 + self.matrix @ vector) / 2.0
+            size = min(size, params.get("k", size))
+        elif "bool" in query:
+            bool_query = query["bool"]
+            mask = self._mask(bool_query.get("filter", []))
+            scores = self._bm25(bool_query["must"]["multi_match"])
+        else:
+            raise ValueError(f"Unsupported query: {list(query)}")
+
+        candidates = np.flatnonzero(mask & (scores > 0))
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:size]]
+        fields = body.get("_source")
+        return {"hits": {"hits": [
+            {
+                "_id": self.ids[position],
+                "_score": float(scores[position]),
+                "_source": {k: v for k, v in self.sources[position].items()
+                            if fields is None or (fields and k in fields)}
+            }
+            for position in top
+        ]}}
+
+    def _mask(self, clauses: List[Dict]) -> np.ndarray:
+        mask = np.ones(len(self.ids), dtype=bool)
+        for clause in clauses:
+            for field, values in clause["terms"].items():
+                key = field.split(".", 1)[1]
+                mask &= np.array([doc["metadata"].get(key) in values for doc in self.sources], dtype=bool)
+        return mask
+
+    def _bm25(self, multi_match: Dict) -> np.ndarray:
+        terms = _tokenize(multi_match["query"])
+        best = np.zeros(len(self.ids), dtype=np.float32)
+        for spec in multi_match["fields"]:
+            field, _, boost = spec.partition("^")
+            postings = self._postings.get(field, {})
+            lengths = self._lengths.get(field)
+            if lengths is None:
+                continue
+            norm = self.k1 * (1 - self.b + self.b * lengths / max(float(lengths.mean()), 1e-9))
+            scores = np.zeros(len(self.ids), dtype=np.float32)
+            for term in terms:
+                docs = postings.get(term)
+                if not docs:
+                    continue
+                idf = np.log(1 + (len(self.ids) - len(docs) + 0.5) / (len(docs) + 0.5))
+                positions = np.fromiter(docs.keys(), dtype=np.int64)
+                tf = np.fromiter(docs.values(), dtype=np.float32)
+                scores[positions] += idf * tf * (self.k1 + 1) / (tf + norm[positions])
+            best = np.maximum(best, scores * float(boost or 1))
+        return best
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
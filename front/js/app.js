@@ -191,13 +191,21 @@ class App {
             });
             const data = await res.json();
 
-            if (data.success) {
+            if (!data.job_id) {
+                this.log(`Error: ${data.error}`);
+                return;
+            }
+
+            this.log(`Job ${data.job_id} queued (${data.files} files)`);
+            const job = await this.waitForJob(data.job_id);
+
+            if (job.status === 'done') {
                 this.log('Complete');
-                this.log(`Indexed: ${data.indexed} chunks`);
-                this.log(`Total: ${data.total_documents} documents`);
+                this.log(`Indexed: ${job.result.indexed} chunks`);
+                this.log(`Total: ${job.result.total_documents} documents`);
                 this.loadStatus();
             } else {
-                this.log(`Error: ${data.error}`);
+                this.log(`Error: ${job.error}`);
             }
         } catch (err) {
             this.log(`Error: ${err.message}`);
@@ -207,6 +215,29 @@ class App {
         }
     }
 
+    async waitForJob(jobId) {
+        let lastProgress = '';
+
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+
+            const res = await fetch(`${API_URL}/api/jobs/${jobId}`);
+            const job = await res.json();
+
+            if (job.status === 'done' || job.status === 'failed') {
+                return job;
+            }
+
+            const p = job.progress || {};
+            const progress = `${job.status}: ${p.files_processed || 0}/${p.files_found || 0} files, ` +
+                `${p.chunks_embedded || 0} chunks embedded, ${p.documents_indexed || 0} indexed`;
+            if (progress !== lastProgress) {
+                this.log(progress);
+                lastProgress = progress;
+            }
+        }
+    }
+
     async search() {
         const query = document.getElementById('search-input').value.trim();
         const topK = parseInt(document.getElementById('top-k').value);
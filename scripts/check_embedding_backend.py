@@ -0,0 +1,58 @@
+# scripts/check_embedding_backend.py
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dataclasses import replace
+from src.config import EmbeddingConfig
+from src.embedding_backends import BACKENDS, check_parity, create_backend
+import logging
+import argparse
+import json
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SAMPLE_TEXTS = [
+    "How to configure a Jenkins pipeline",
+    "Comment déployer l'application avec Docker Compose ?",
+    "def parse(self, file_path: Path) -> Dict:",
+    "apiVersion: apps/v1\nkind: Deployment\nmetadata:\n  name: docvector",
+    "OpenSearch k-NN index with faiss HNSW and cosine similarity",
+    "Ansible playbook to install nginx on Ubuntu servers",
+    "Le chunker découpe les documents en morceaux de 512 caractères",
+    "terraform apply -var-file=prod.tfvars",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description='Parité d\'un backend d\'embedding avec PyTorch')
+    parser.add_argument('--backend', choices=BACKENDS, default='onnx-int8', help='Backend à vérifier')
+    parser.add_argument('--min-cosine', type=float, default=0.99, help='Cosinus minimal par texte')
+    parser.add_argument('--repeat', type=int, default=20, help='Répétitions pour la mesure de latence')
+    args = parser.parse_args()
+    
+    config = EmbeddingConfig()
+    reference = create_backend(replace(config, backend='torch'))
+    candidate = create_backend(replace(config, backend=args.backend))
+    
+    report = check_parity(reference, candidate, SAMPLE_TEXTS, min_cosine=args.min_cosine)
+    report["backend"] = args.backend
+    
+    for name, backend in (("torch", reference), (args.backend, candidate)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            backend.encode(SAMPLE_TEXTS[:1])
+        report[f"{name}_query_ms"] = round((time.perf_counter() - start) * 1000 / args.repeat, 2)
+    
+    print(json.dumps(report, indent=2))
+    if not report["ok"]:
+        logger.error(f"❌ Parité insuffisante (min cosinus {report['min_cosine']:.4f} < {args.min_cosine})")
+        sys.exit(1)
+    logger.info("✅ Parité OK")
+
+if __name__ == "__main__":
+    main()
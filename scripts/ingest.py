@@ -3,11 +3,12 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.config import OpenSearchConfig, EmbeddingConfig, ChunkingConfig
+from src.config import OpenSearchConfig, EmbeddingConfig, ChunkingConfig, IngestionConfig
 from src.opensearch_client import OpenSearchClient
 from src.embeddings import EmbeddingGenerator
-from src.chunker import TextChunker
+from src.chunker import create_chunker
 from src.ingestion_pipeline import IngestionPipeline
+from src.manifest import IngestionManifest
 import logging
 import argparse
 
@@ -22,39 +23,50 @@ def main():
     parser.add_argument('--input-dir', type=str, default='./data/input', help='Répertoire source')
     parser.add_argument('--recreate-index', action='store_true', help='Recréer l\'index')
     parser.add_argument('--batch-size', type=int, default=50, help='Taille des batchs')
+    parser.add_argument('--embed-batch-size', type=int, default=None,
+                        help='Taille des batchs d\'embedding (défaut: EMBEDDING_BATCH_SIZE)')
+    parser.add_argument('--knn-warmup', action='store_true',
+                        help='Précharger le graphe k-NN après --recreate-index')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Ignorer les fichiers inchangés depuis le dernier run')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Process de parsing en parallèle (défaut: INGEST_WORKERS)')
     args = parser.parse_args()
     
     # Config
     os_config = OpenSearchConfig()
     embed_config = EmbeddingConfig()
     chunk_config = ChunkingConfig()
+    ingest_config = IngestionConfig()
     
     # Client OpenSearch
     logger.info("Initialisation OpenSearch...")
     os_client = OpenSearchClient(os_config)
     
-    # Gestion index
-    if args.recreate_index:
-        logger.info("Mode recreate-index : suppression puis création")
-        os_client.delete_index()
-        os_client.create_index(dimension=embed_config.dimension)
-    else:
-        # Crée l'index seulement s'il n'existe pas
-        logger.info("Vérification/création index...")
-        os_client.create_index(dimension=embed_config.dimension)
+    # Manifest ingestion incrémentale
+    manifest = IngestionManifest(Path(ingest_config.manifest_path))
+    
+    # Gestion index (création si absent ; --recreate-index reconstruit à côté)
+    logger.info("Vérification/création index...")
+    os_client.create_index(dimension=embed_config.dimension)
     
     # Embeddings
     logger.info("Initialisation modèle embeddings...")
     embedder = EmbeddingGenerator(embed_config)
     
     # Chunker
-    chunker = TextChunker(
-        max_chunk_size=chunk_config.max_chunk_size,
-        overlap=chunk_config.overlap
-    )
+    chunker = create_chunker(chunk_config, embed_config.model_name)
     
     # Pipeline
-    pipeline = IngestionPipeline(os_client, embedder, chunker)
+    pipeline = IngestionPipeline(
+        os_client, embedder, chunker,
+        embed_batch_size=args.embed_batch_size or embed_config.batch_size,
+        workers=args.workers or ingest_config.workers,
+        queue_size=ingest_config.queue_size,
+        manifest=manifest,
+        dedup=ingest_config.dedup,
+        dedup_max_distance=ingest_config.dedup_max_distance
+    )
     
     # Vérif répertoire input
     input_dir = Path(args.input_dir)
@@ -64,7 +76,26 @@ def main():
     
     # Ingestion
     logger.info(f"Début ingestion depuis {input_dir}")
-    total = pipeline.process_directory(input_dir, batch_size=args.batch_size)
+    if args.recreate_index:
+        # Nouvel index versionné rempli pendant que l'alias sert l'ancien,
+        # refresh/replicas coupés pendant le chargement, puis bascule
+        logger.info("Mode recreate-index : reconstruction puis bascule de l'alias")
+        snapshot = manifest.snapshot()
+        manifest.clear()
+        try:
+            with os_client.rebuild_index(dimension=embed_config.dimension):
+                with os_client.bulk_load_mode(warmup=args.knn_warmup):
+                    total = pipeline.process_directory(input_dir, batch_size=args.batch_size)
+        except BaseException:
+            manifest.restore(snapshot)
+            raise
+    else:
+        total = pipeline.process_directory(
+            input_dir, batch_size=args.batch_size, incremental=args.incremental
+        )
+    logger.info(f"Stats: {pipeline.stats}")
+    if embedder.cache is not None:
+        logger.info(f"Cache embeddings: {embedder.cache_stats()}")
     
     # Stats finales
     count = os_client.count_documents()
@@ -0,0 +1,64 @@
+# scripts/reindex.py
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.config import OpenSearchConfig, EmbeddingConfig, ChunkingConfig, IngestionConfig
+from src.opensearch_client import OpenSearchClient
+from src.embeddings import EmbeddingGenerator
+from src.chunker import create_chunker
+from src.ingestion_pipeline import IngestionPipeline
+import logging
+import argparse
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reconstruit l\'index en ré-embeddant son contenu (sans relire les vecteurs ni les fichiers)'
+    )
+    parser.add_argument('--embed-batch-size', type=int, default=None,
+                        help='Taille des batchs d\'embedding (défaut: EMBEDDING_BATCH_SIZE)')
+    parser.add_argument('--knn-warmup', action='store_true', help='Précharger le graphe k-NN après la bascule')
+    args = parser.parse_args()
+    
+    os_config = OpenSearchConfig()
+    embed_config = EmbeddingConfig()
+    ingest_config = IngestionConfig()
+    
+    os_client = OpenSearchClient(os_config)
+    source_index = os_client.current_index()
+    if source_index is None:
+        logger.error(f"❌ Index {os_client.index_name} introuvable")
+        return
+    
+    embedder = EmbeddingGenerator(embed_config)
+    pipeline = IngestionPipeline(
+        os_client, embedder, create_chunker(ChunkingConfig(), embed_config.model_name),
+        embed_batch_size=args.embed_batch_size or embed_config.batch_size,
+        queue_size=ingest_config.queue_size
+    )
+    
+    before = {s["index"]: s for s in os_client.index_sizes()}.get(source_index)
+    # Nouvelle version (mapping courant : encodage, _source) remplie depuis
+    # l'ancienne, servie par l'alias jusqu'à la bascule
+    logger.info(f"Reindex de {source_index} (encodage {os_config.vector_encoding}, "
+                f"vecteurs dans _source: {os_config.vectors_in_source})")
+    with os_client.rebuild_index(dimension=embedder.dimension) as new_index:
+        with os_client.bulk_load_mode(warmup=args.knn_warmup):
+            total = pipeline.reindex(source_index)
+        if pipeline.stats["errors"]:
+            raise RuntimeError(f"Reindex incomplet: {pipeline.stats['errors']}")
+    
+    after = {s["index"]: s for s in os_client.index_sizes()}.get(new_index)
+    logger.info(f"Stats: {pipeline.stats}")
+    logger.info(f"✅ {total} documents réindexés dans {new_index}")
+    if before and after:
+        logger.info(f"Taille: {before['size_mb']} Mo -> {after['size_mb']} Mo")
+
+if __name__ == "__main__":
+    main()
@@ -3,61 +3,29 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.config import OpenSearchConfig, EmbeddingConfig
+from src.config import OpenSearchConfig, EmbeddingConfig, SearchConfig
 from src.opensearch_client import OpenSearchClient
 from src.embeddings import EmbeddingGenerator
+from src.search import HybridSearcher
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RAGValidator:
-    def __init__(self, os_client: OpenSearchClient, embedder: EmbeddingGenerator):
+    def __init__(self, os_client: OpenSearchClient, embedder: EmbeddingGenerator, search_config: SearchConfig):
         self.client = os_client.client
         self.embedder = embedder
         self.index_name = os_client.index_name
+        self.searcher = HybridSearcher.from_config(self.client, self.index_name, embedder, search_config)
     
-    def hybrid_search(self, query: str, top_k: int = 5):
-        """Recherche hybride: vector + keyword"""
-        
-        # Générer embedding de la query
-        query_embedding = self.embedder.encode(query)
-        
-        search_body = {
-            "size": top_k,
-            "query": {
-                "bool": {
-                    "should": [
-                        # Vector search
-                        {
-                            "script_score": {
-                                "query": {"match_all": {}},
-                                "script": {
-                                    "source": "knn_score",
-                                    "lang": "knn",
-                                    "params": {
-                                        "field": "embedding",
-                                        "query_value": query_embedding,
-                                        "space_type": "cosinesimil"
-                                    }
-                                },
-                                "boost": 0.7
-                            }
-                        },
-                        # Keyword search
-                        {
-                            "multi_match": {
-                                "query": query,
-                                "fields": ["content^2", "title"],
-                                "type": "best_fields",
-                                "boost": 0.3
-                            }
-                        }
-                    ]
-                }
-            },
-            "_source": ["content", "metadata", "title"],
-            "highlight": {
+    def hybrid_search(self, query: str, top_k: int = 5, filters: dict = None):
+        """Recherche hybride: vector + keyword (k-NN et BM25 fusionnés)"""
+        results = self.searcher.search(
+            query,
+            top_k=top_k,
+            filters=filters,
+            highlight={
                 "fields": {
                     "content": {
                         "fragment_size": 150,
@@ -65,22 +33,20 @@ class RAGValidator:
                     }
                 }
             }
-        }
-        
-        response = self.client.search(index=self.index_name, body=search_body)
-        return self._format_results(response)
+        )
+        return self._format_results(results)
     
-    def _format_results(self, response):
-        results = []
-        for hit in response['hits']['hits']:
-            results.append({
-                "score": hit['_score'],
-                "content": hit['_source']['content'][:500],  # Tronqué pour affichage
-                "metadata": hit['_source']['metadata'],
-                "title": hit['_source'].get('title', 'N/A'),
-                "highlights": hit.get('highlight', {}).get('content', [])
+    def _format_results(self, results):
+        formatted = []
+        for result in results:
+            formatted.append({
+                "score": result['score'],
+                "content": result['source']['content'][:500],  # Tronqué pour affichage
+                "metadata": result['source']['metadata'],
+                "title": result['source'].get('title', 'N/A'),
+                "highlights": result['highlight'].get('content', [])
             })
-        return results
+        return formatted
     
     def test_rag_pipeline(self):
         """Test complet du pipeline RAG"""
@@ -138,7 +104,7 @@ def main():
     embedder = EmbeddingGenerator(embed_config)
     
     # Validation
-    validator = RAGValidator(os_client, embedder)
+    validator = RAGValidator(os_client, embedder, SearchConfig())
     validator.test_rag_pipeline()
     
     logger.info("\n✅ Validation RAG terminée")
@@ -0,0 +1,195 @@
+# src/bulk_indexer.py
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import json
+import logging
+import threading
+import time
+
+from opensearchpy import helpers
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Statuts réessayables : surcharge du cluster ou erreur de transport
+RETRYABLE_STATUSES = {429, 502, 503, 504, "N/A"}
+
+
+class BulkIndexer:
+    """Indexation bulk en streaming
+
+    Consomme un générateur de documents avec parallel_bulk (threads, chunks
+    bornés en nombre de documents et en octets). Les documents rejetés
+    (429, es_rejected_execution_exception, transport) sont réessayés avec un
+    backoff exponentiel ; les échecs définitifs vont dans un fichier
+    dead-letter JSONL.
+    """
+
+    def __init__(self, client, index_name: str, thread_count: int = 2, chunk_size: int = 500,
+                 max_chunk_bytes: int = 10 * 1024 * 1024, max_retries: int = 5,
+                 initial_backoff: float = 2, max_backoff: float = 60,
+                 dead_letter_path: Optional[Path] = None):
+        self.client = _MeteredClient(client)
+        self.index_name = index_name
+        self.thread_count = max(1, thread_count)
+        self.chunk_size = chunk_size
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        self._dead_letter_lock = threading.Lock()
+
+    def index(self, documents: Iterable[Dict],
+              on_result: Optional[Callable[[bool, str], None]] = None) -> Dict:
+        """Indexe le flux, retourne {"success", "failed", "failed_ids", "retried"}"""
+        result = {"success": 0, "failed": 0, "failed_ids": [], "retried": 0}
+        in_flight = deque()
+        rejected = []
+
+        def actions():
+            for doc in documents:
+                in_flight.append(doc)
+                yield self._action(doc)
+
+        stream = helpers.parallel_bulk(
+            self.client, actions(),
+            thread_count=self.thread_count,
+            chunk_size=self.chunk_size,
+            max_chunk_bytes=self.max_chunk_bytes,
+            queue_size=self.thread_count,
+            raise_on_error=False,
+            raise_on_exception=False
+        )
+
+        # parallel_bulk rend les résultats dans l'ordre des actions
+        for ok, item in stream:
+            doc = in_flight.popleft()
+            if ok:
+                self._record_success(result, doc, on_result)
+                continue
+
+            info = self._item_info(item)
+            if self._is_retryable(info):
+                metrics.BULK_RESULTS.labels("rejected").inc()
+                rejected.append(doc)
+                if len(rejected) >= self.chunk_size:
+                    self._retry(rejected, result, on_result)
+                    rejected = []
+            else:
+                self._record_failure(result, doc, info, on_result)
+
+        if rejected:
+            self._retry(rejected, result, on_result)
+
+        logger.info(
+            f"Indexés: {result['success']}, Échecs: {result['failed']}, Réessais: {result['retried']}"
+        )
+        return result
+
+    def _retry(self, docs: List[Dict], result: Dict, on_result):
+        """Renvoie les rejets avec backoff exponentiel (bloque le flux : backpressure)"""
+        last_info = {}
+        for attempt in range(1, self.max_retries + 1):
+            delay = min(self.initial_backoff * 2 ** (attempt - 1), self.max_backoff)
+            logger.warning(f"{len(docs)} documents rejetés, nouvel essai {attempt} dans {delay}s")
+            time.sleep(delay)
+            result["retried"] += len(docs)
+
+            still_rejected = []
+            stream = helpers.streaming_bulk(
+                self.client, (self._action(doc) for doc in docs),
+                chunk_size=self.chunk_size,
+                max_chunk_bytes=self.max_chunk_bytes,
+                raise_on_error=False,
+                raise_on_exception=False,
+                max_retries=0
+            )
+            for doc, (ok, item) in zip(docs, stream):
+                if ok:
+                    self._record_success(result, doc, on_result)
+                    continue
+                info = self._item_info(item)
+                if self._is_retryable(info):
+                    metrics.BULK_RESULTS.labels("rejected").inc()
+                    still_rejected.append(doc)
+                    last_info = info
+                else:
+                    self._record_failure(result, doc, info, on_result)
+
+            docs = still_rejected
+            if not docs:
+                return
+
+        for doc in docs:
+            self._record_failure(result, doc, {**last_info, "reason": "max retries reached"}, on_result)
+
+    def _action(self, doc: Dict) -> Dict:
+        return {"_index": self.index_name, "_id": doc["chunk_id"], "_source": doc}
+
+    def _item_info(self, item: Dict) -> Dict:
+        _, info = next(iter(item.items()))
+        return info
+
+    def _is_retryable(self, info: Dict) -> bool:
+        if info.get("status") in RETRYABLE_STATUSES:
+            return True
+        error = info.get("error")
+        error_type = error.get("type") if isinstance(error, dict) else str(error)
+        return "rejected_execution_exception" in (error_type or "")
+
+    def _record_success(self, result: Dict, doc: Dict, on_result):
+        metrics.BULK_RESULTS.labels("indexed").inc()
+        result["success"] += 1
+        if on_result is not None:
+            on_result(True, doc["chunk_id"])
+
+    def _record_failure(self, result: Dict, doc: Dict, info: Dict, on_result):
+        metrics.BULK_RESULTS.labels("failed").inc()
+        result["failed"] += 1
+        result["failed_ids"].append(doc["chunk_id"])
+        self._dead_letter(doc, info)
+        if on_result is not None:
+            on_result(False, doc["chunk_id"])
+
+    def _dead_letter(self, doc: Dict, info: Dict):
+        """Echec définitif : document (sans vecteur, ré-embeddable) + erreur"""
+        if self.dead_letter_path is None:
+            return
+
+        record = {
+            "chunk_id": doc["chunk_id"],
+            "index": self.index_name,
+            "status": str(info.get("status")),
+            "error": info.get("error") if isinstance(info.get("error"), (dict, str)) else str(info.get("error")),
+            "reason": info.get("reason"),
+            "failed_at": time.time(),
+            "document": {k: v for k, v in doc.items() if k != "embedding"}
+        }
+        try:
+            with self._dead_letter_lock:
+                self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"Ecriture dead-letter impossible: {e}")
+
+
+class _MeteredClient:
+    """Client transmis aux helpers bulk : taille et latence de chaque requête _bulk"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def bulk(self, body, *args, **kwargs):
+        # Corps NDJSON : action + source par document indexé
+        payload = body.encode('utf-8') if isinstance(body, str) else body
+        metrics.BULK_BYTES.observe(len(payload))
+        metrics.BULK_DOCUMENTS.observe(payload.count(b"\n") // 2)
+        with metrics.BULK_SECONDS.time():
+            return self._client.bulk(payload, *args, **kwargs)
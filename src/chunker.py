@@ -1,5 +1,6 @@
 # src/chunker.py
-from typing import List, Dict
+from pathlib import Path
+from typing import Callable, List, Dict, Optional, Tuple
 import re
 
 class TextChunker:
@@ -44,4 +45,175 @@ class TextChunker:
         for chunk in chunks:
             chunk["metadata"]["total_chunks"] = len(chunks)
         
-        return chunks
\ No newline at end of file
+        return chunks
+    
+    def chunk_rows(self, prefix: List[str], rows: List[Tuple[int, str]], metadata: Dict) -> List[Dict]:
+        """Lignes de tableau groupées dans la limite de mots, préfixe répété"""
+        return row_chunks(self, prefix, rows, metadata, self.max_chunk_size,
+                          lambda texts: [len(text.split()) for text in texts])
+
+
+def row_chunks(chunker, prefix: List[str], rows: List[Tuple[int, str]], metadata: Dict,
+               budget: int, count: Callable[[List[str]], List[int]],
+               size_key: Optional[str] = None) -> List[Dict]:
+    """Chunks de lignes de tableau (feuilles Excel)
+
+    Chaque chunk commence par le préfixe (feuille, en-tête de colonnes) et
+    prend des lignes entières tant que le budget le permet ; row_start /
+    row_end sont ceux des lignes du chunk. Une ligne seule trop longue est
+    découpée comme du texte.
+    """
+    if not rows:
+        return chunker.chunk_text("\n".join(prefix), metadata)
+
+    sizes = count(prefix + [line for _, line in rows])
+    prefix_size = sum(sizes[:len(prefix)])
+    groups: List[List[Tuple[int, str]]] = []
+    group: List[Tuple[int, str]] = []
+    size = prefix_size
+    for row, row_size in zip(rows, sizes[len(prefix):]):
+        if group and size + row_size > budget:
+            groups.append(group)
+            group = []
+            size = prefix_size
+        group.append(row)
+        size += row_size
+    groups.append(group)
+
+    chunks = []
+    for group in groups:
+        text = "\n".join(prefix + [line for _, line in group])
+        group_metadata = {**metadata, "row_start": group[0][0], "row_end": group[-1][0]}
+        # Compte exact sur le texte assemblé (la somme par ligne est une estimation)
+        size = count([text])[0]
+        if size > budget:
+            chunks.extend(chunker.chunk_text(text, group_metadata))
+            continue
+        if size_key:
+            group_metadata[size_key] = size
+        chunks.append({"text": text, "metadata": group_metadata})
+
+    for index, chunk in enumerate(chunks):
+        chunk["metadata"]["chunk_index"] = index
+        chunk["metadata"]["total_chunks"] = len(chunks)
+    return chunks
+
+# Type de source (metadata.source_type) -> stratégie de CHUNKING_STRATEGIES
+SOURCE_TYPE_STRATEGIES = {
+    "markdown": "markdown",
+    "code": "code",
+    "document": "document",
+    "devops": "yaml",
+}
+
+
+class TokenChunker:
+    """Chunks en tokens du tokenizer du modèle d'embedding
+
+    Chaque chunk tient dans la longueur max du modèle (tokens spéciaux
+    compris) : rien n'est tronqué à l'encodage. Le texte est découpé dans
+    l'original via les offsets du fast tokenizer, sans recoller les mots.
+    max_tokens/overlap viennent de CHUNKING_STRATEGIES selon source_type.
+    """
+
+    def __init__(self, tokenizer_name: str, max_seq_length: int = 256,
+                 strategies: Optional[Dict[str, dict]] = None,
+                 default_max_tokens: int = 512, default_overlap: int = 50):
+        self.tokenizer_name = tokenizer_name
+        self.max_seq_length = max_seq_length
+        self.strategies = strategies or {}
+        self.default_max_tokens = default_max_tokens
+        self.default_overlap = default_overlap
+        self._tokenizer = None
+
+    def __getstate__(self):
+        # Workers de parsing (spawn) : le tokenizer est rechargé sur place
+        state = self.__dict__.copy()
+        state["_tokenizer"] = None
+        return state
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+
+            self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name, use_fast=True)
+        return self._tokenizer
+
+    def limits(self, metadata: Dict) -> Tuple[int, int]:
+        """(tokens max par chunk, overlap) pour le type de source"""
+        strategy = self.strategies.get(SOURCE_TYPE_STRATEGIES.get(metadata.get("source_type"), ""), {})
+        max_tokens = strategy.get("max_tokens", self.default_max_tokens)
+        # Place pour [CLS]/[SEP] ajoutés à l'encodage
+        special = self.tokenizer.num_special_tokens_to_add(pair=False)
+        max_tokens = max(1, min(max_tokens, self.max_seq_length - special))
+        overlap = min(strategy.get("overlap", self.default_overlap), max_tokens - 1)
+        return max_tokens, max(0, overlap)
+
+    def chunk_text(self, text: str, metadata: Dict) -> List[Dict]:
+        """Split texte en chunks de tokens avec overlap"""
+        max_tokens, overlap = self.limits(metadata)
+        offsets = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )["offset_mapping"]
+
+        if len(offsets) <= max_tokens:
+            return [{
+                "text": text,
+                "metadata": {**metadata, "chunk_index": 0, "total_chunks": 1,
+                             "token_count": len(offsets)}
+            }]
+
+        chunks = []
+        start = 0
+        while start < len(offsets):
+            end = min(start + max_tokens, len(offsets))
+            chunks.append({
+                "text": text[offsets[start][0]:offsets[end - 1][1]],
+                "metadata": {
+                    **metadata,
+                    "chunk_index": len(chunks),
+                    "total_chunks": -1,  # sera mis à jour
+                    "token_count": end - start
+                }
+            })
+            if end == len(offsets):
+                break
+            start = end - overlap
+
+        for chunk in chunks:
+            chunk["metadata"]["total_chunks"] = len(chunks)
+
+        return chunks
+
+    def chunk_rows(self, prefix: List[str], rows: List[Tuple[int, str]], metadata: Dict) -> List[Dict]:
+        """Lignes de tableau groupées dans la limite de tokens, préfixe répété"""
+        max_tokens, _ = self.limits(metadata)
+        return row_chunks(self, prefix, rows, metadata, max_tokens, self._token_counts, "token_count")
+
+    def _token_counts(self, texts: List[str]) -> List[int]:
+        encoded = self.tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+
+def create_chunker(chunk_config, model_name: str):
+    """TokenChunker (mode "tokens") ou TextChunker historique en mots"""
+    if chunk_config.mode == "words":
+        return TextChunker(chunk_config.max_chunk_size, chunk_config.overlap)
+    if chunk_config.mode != "tokens":
+        raise ValueError(f"Unsupported chunking mode: {chunk_config.mode}")
+
+    from .config import CHUNKING_STRATEGIES
+
+    tokenizer_name = chunk_config.tokenizer or model_name
+    # Nom court sentence-transformers -> dépôt du hub
+    if "/" not in tokenizer_name and not Path(tokenizer_name).exists():
+        tokenizer_name = f"sentence-transformers/{tokenizer_name}"
+
+    return TokenChunker(
+        tokenizer_name,
+        max_seq_length=chunk_config.max_seq_length,
+        strategies=CHUNKING_STRATEGIES,
+        default_max_tokens=chunk_config.max_chunk_size,
+        default_overlap=chunk_config.overlap
+    )
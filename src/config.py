@@ -19,17 +19,114 @@ class OpenSearchConfig:
     use_ssl: bool = os.getenv("OPENSEARCH_USE_SSL", "false").lower() == "true"
     verify_certs: bool = os.getenv("OPENSEARCH_VERIFY_CERTS", "false").lower() == "true"
     index_name: str = os.getenv("INDEX_NAME", "knowledge_base")
+    number_of_shards: int = int(os.getenv("OPENSEARCH_SHARDS", "2"))
+    number_of_replicas: int = int(os.getenv("OPENSEARCH_REPLICAS", "1"))
+    # Versions physiques précédentes conservées après un rebuild (rollback)
+    keep_versions: int = int(os.getenv("INDEX_KEEP_VERSIONS", "0"))
+    # Graphe HNSW (appliqué à la création d'un index / au rebuild)
+    knn_m: int = int(os.getenv("OPENSEARCH_KNN_M", "16"))
+    knn_ef_construction: int = int(os.getenv("OPENSEARCH_KNN_EF_CONSTRUCTION", "128"))
+    # Stockage des vecteurs : float | fp16 (faiss sq) | byte (changement = rebuild)
+    vector_encoding: str = os.getenv("OPENSEARCH_VECTOR_ENCODING", "float")
+    # Décimales des vecteurs dans le JSON bulk (0 = selon l'encodage : float 7, fp16 4)
+    vector_decimals: int = int(os.getenv("OPENSEARCH_VECTOR_DECIMALS", "0"))
+    # Vecteur conservé dans _source (jamais relu : exclu par défaut, ré-embedding au reindex)
+    vectors_in_source: bool = os.getenv("OPENSEARCH_VECTORS_IN_SOURCE", "false").lower() == "true"
+    # Indexation bulk en streaming
+    bulk_threads: int = int(os.getenv("OPENSEARCH_BULK_THREADS", "2"))
+    bulk_chunk_size: int = int(os.getenv("OPENSEARCH_BULK_CHUNK_SIZE", "500"))
+    bulk_max_bytes: int = int(os.getenv("OPENSEARCH_BULK_MAX_BYTES", str(10 * 1024 * 1024)))
+    bulk_max_retries: int = int(os.getenv("OPENSEARCH_BULK_MAX_RETRIES", "5"))
+    bulk_initial_backoff: float = float(os.getenv("OPENSEARCH_BULK_INITIAL_BACKOFF", "2"))
+    bulk_max_backoff: float = float(os.getenv("OPENSEARCH_BULK_MAX_BACKOFF", "60"))
+    dead_letter_path: str = os.getenv("OPENSEARCH_DEAD_LETTER_PATH", str(project_root / "data" / "dead_letter.jsonl"))
+    # Génération de l'index, incrémentée à chaque écriture (invalidation du cache de recherche)
+    generation_path: str = os.getenv("INDEX_GENERATION_PATH", str(project_root / "data" / "index_generation"))
+    # Tailles de l'index sortant et du nouvel index au dernier rebuild (/api/status)
+    rebuild_report_path: str = os.getenv("INDEX_REBUILD_REPORT_PATH", str(project_root / "data" / "index_rebuild.json"))
     
 @dataclass
 class EmbeddingConfig:
     model_name: str = "all-MiniLM-L6-v2"
     dimension: int = 384
     device: str = "cpu"
+    batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    # Backend d'inférence : torch | onnx | onnx-int8 (onnxruntime, CPU)
+    backend: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    onnx_dir: str = os.getenv("EMBEDDING_ONNX_DIR", str(project_root / "data" / "onnx" / "all-MiniLM-L6-v2"))
+    onnx_threads: int = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+    # Cache disque des embeddings (SQLite, LRU)
+    cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", str(project_root / "data" / "embedding_cache.sqlite"))
+    cache_max_entries: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1000000"))
+    # Serveur d'embeddings partagé : un seul process détient le modèle,
+    # les workers gunicorn l'interrogent sur une socket Unix
+    service_enabled: bool = os.getenv("EMBEDDING_SERVICE", "false").lower() == "true"
+    service_socket: str = os.getenv("EMBEDDING_SERVICE_SOCKET", "/tmp/docvector-embeddings.sock")
+    # Micro-batching des petits appels concurrents (requêtes de recherche) :
+    # fenêtre d'attente en ms (0 = désactivé) et taille max du batch regroupé
+    batch_window_ms: float = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "2"))
+    batch_max: int = int(os.getenv("EMBEDDING_BATCH_MAX", "32"))
 
 @dataclass
 class ChunkingConfig:
     max_chunk_size: int = 512
     overlap: int = 50
+    # tokens : tokenizer du modèle + CHUNKING_STRATEGIES | words : découpage historique
+    mode: str = os.getenv("CHUNKING_MODE", "tokens")
+    # Longueur max du modèle (all-MiniLM-L6-v2 tronque à 256 wordpieces)
+    max_seq_length: int = int(os.getenv("CHUNKING_MAX_SEQ_LENGTH", "256"))
+    # Tokenizer (défaut : celui du modèle d'embedding)
+    tokenizer: str = os.getenv("CHUNKING_TOKENIZER", "")
+
+@dataclass
+class SearchConfig:
+    # Taille de la liste de candidats HNSW à la requête (recall vs latence)
+    ef_search: int = int(os.getenv("SEARCH_EF_SEARCH", "100"))
+    # Fusion hybride : rrf | minmax (client) | pipeline (normalization-processor)
+    fusion: str = os.getenv("SEARCH_FUSION", "rrf")
+    rrf_k: int = int(os.getenv("SEARCH_RRF_K", "60"))
+    vector_weight: float = float(os.getenv("SEARCH_VECTOR_WEIGHT", "0.7"))
+    keyword_weight: float = float(os.getenv("SEARCH_KEYWORD_WEIGHT", "0.3"))
+    # Candidats par jambe avant fusion
+    candidates: int = int(os.getenv("SEARCH_CANDIDATES", "50"))
+    pipeline_name: str = os.getenv("SEARCH_PIPELINE_NAME", "docvector-hybrid")
+    # Cache requête -> embedding et requête -> résultats (par worker, TTL + LRU),
+    # invalidé par la génération d'index
+    cache_enabled: bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    cache_ttl: float = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+    cache_max_embeddings: int = int(os.getenv("SEARCH_CACHE_MAX_EMBEDDINGS", "10000"))
+    cache_max_results: int = int(os.getenv("SEARCH_CACHE_MAX_RESULTS", "1000"))
+
+@dataclass
+class IngestionConfig:
+    # Process de parsing/chunking (1 = tout dans le process courant)
+    workers: int = int(os.getenv("INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+    # Taille des queues bornées entre étages (en batches)
+    queue_size: int = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+    # Manifest fichier -> hash/chunk ids pour l'ingestion incrémentale
+    manifest_path: str = os.getenv("INGEST_MANIFEST_PATH", str(project_root / "data" / "ingest_manifest.json"))
+    # Jobs d'ingestion asynchrones (queue SQLite persistée)
+    jobs_db_path: str = os.getenv("INGEST_JOBS_DB_PATH", str(project_root / "data" / "jobs.sqlite"))
+    job_workers: int = int(os.getenv("INGEST_JOB_WORKERS", "1"))
+    # Un job sans heartbeat depuis ce délai est repris par un autre worker
+    job_lease_seconds: int = int(os.getenv("INGEST_JOB_LEASE_SECONDS", "120"))
+    # Extraction PDF par plages de pages dans un pool de process
+    pdf_workers: int = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+    pdf_pages_per_task: int = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+    pdf_parallel_min_pages: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+    # Budget d'extraction par page en secondes (0 = illimité), page ignorée au-delà
+    pdf_page_budget: float = float(os.getenv("PDF_PAGE_BUDGET", "0"))
+    # Déduplication des chunks : off | exact | near (SimHash, distance de Hamming max)
+    dedup: str = os.getenv("INGEST_DEDUP", "off")
+    dedup_max_distance: int = int(os.getenv("INGEST_DEDUP_MAX_DISTANCE", "3"))
+
+@dataclass
+class MetricsConfig:
+    # Métriques Prometheus sur /metrics (nécessite prometheus_client)
+    enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Répertoire partagé par les process gunicorn (mode multiprocess), vidé au démarrage
+    multiproc_dir: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/tmp/docvector-metrics")
     
 CHUNKING_STRATEGIES: Dict[str, dict] = {
     "markdown": {"max_tokens": 512, "overlap": 50},
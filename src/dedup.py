@@ -0,0 +1,125 @@
+# src/dedup.py
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import re
+import numpy as np
+
+DEDUP_MODES = ("off", "exact", "near")
+
+# Issue de la résolution d'un chunk
+NEW = "new"                  # premier exemplaire : embeddé et indexé
+EXACT = "exact"              # même texte normalisé qu'un chunk de l'ingestion
+NEAR = "near"                # SimHash à moins de max_distance bits d'un chunk de l'ingestion
+INDEXED = "indexed"          # déjà dans l'index (ingestion précédente)
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4            # 4 x 16 bits : distance <= 3 => au moins une bande identique
+MAX_NEAR_DISTANCE = SIMHASH_BANDS - 1
+
+_BIT_POSITIONS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """Texte comparé : casse et espacement ignorés"""
+    return " ".join(text.split()).casefold()
+
+
+def content_id(text: str) -> str:
+    """Chunk id dérivé du contenu normalisé (même format que les ids par position)"""
+    return hashlib.md5(normalize(text).encode('utf-8')).hexdigest()
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """SimHash 64 bits sur les shingles de mots du texte normalisé"""
+    words = re.findall(r"\w+", normalize(text))
+    if not words:
+        return 0
+    shingles = [" ".join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+         for s in shingles],
+        dtype=np.uint64
+    )
+    bits = (hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.dot(votes.astype(np.uint64), np.uint64(1) << _BIT_POSITIONS))
+
+
+class ChunkDeduplicator:
+    """Empreintes des chunks d'une ingestion
+
+    Doublons exacts : hash du texte normalisé (le chunk id). Quasi-doublons
+    (mode near) : SimHash 64 bits, candidats trouvés par bandes de 16 bits
+    puis distance de Hamming vérifiée. known_ids sont les chunks déjà
+    indexés par une ingestion précédente (manifest).
+    """
+
+    def __init__(self, near_duplicates: bool = False, max_distance: int = 3,
+                 known_ids: Iterable[str] = ()):
+        # Au-delà, deux empreintes proches peuvent ne partager aucune bande :
+        # quasi-doublons manqués sans que les statistiques le montrent
+        if near_duplicates and not 0 <= max_distance <= MAX_NEAR_DISTANCE:
+            raise ValueError(
+                f"Unsupported near-duplicate distance: {max_distance} (expected 0 to {MAX_NEAR_DISTANCE})"
+            )
+        self.near_duplicates = near_duplicates
+        self.max_distance = max_distance
+        self.known_ids = set(known_ids)
+        self._seen = set()
+        self._bands: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(SIMHASH_BANDS)]
+        self.stats = {"chunks": 0, NEW: 0, EXACT: 0, NEAR: 0, INDEXED: 0}
+
+    def resolve(self, text: str) -> Tuple[str, str]:
+        """(chunk id canonique, issue) ; seuls les NEW sont à embedder"""
+        self.stats["chunks"] += 1
+        chunk_id = content_id(text)
+
+        if chunk_id in self._seen:
+            return self._count(chunk_id, EXACT)
+        if chunk_id in self.known_ids:
+            self._seen.add(chunk_id)
+            return self._count(chunk_id, INDEXED)
+
+        fingerprint = None
+        if self.near_duplicates:
+            fingerprint = simhash(text)
+            near = self._nearest(fingerprint)
+            if near is not None:
+                return self._count(near, NEAR)
+
+        self._seen.add(chunk_id)
+        if fingerprint is not None:
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                self._bands[band].setdefault(key, []).append((fingerprint, chunk_id))
+        return self._count(chunk_id, NEW)
+
+    def summary(self) -> Dict:
+        chunks = self.stats["chunks"]
+        duplicates = self.stats[EXACT] + self.stats[NEAR] + self.stats[INDEXED]
+        return {
+            "chunks": chunks,
+            "unique": self.stats[NEW],
+            "exact_duplicates": self.stats[EXACT],
+            "near_duplicates": self.stats[NEAR],
+            "already_indexed": self.stats[INDEXED],
+            "embeddings_saved": duplicates,
+            "duplicate_ratio": round(duplicates / chunks, 4) if chunks else 0.0
+        }
+
+    def _count(self, chunk_id: str, outcome: str) -> Tuple[str, str]:
+        self.stats[outcome] += 1
+        return chunk_id, outcome
+
+    def _nearest(self, fingerprint: int) -> Optional[str]:
+        best = None
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            for candidate, chunk_id in self._bands[band].get(key, ()):
+                distance = bin(candidate ^ fingerprint).count("1")
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, chunk_id)
+        return best[1] if best else None
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        width = SIMHASH_BITS // SIMHASH_BANDS
+        mask = (1 << width) - 1
+        return [(fingerprint >> (band * width)) & mask for band in range(SIMHASH_BANDS)]
@@ -0,0 +1,256 @@
+# src/embedding_backends.py
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import fcntl
+import json
+import logging
+import os
+import shutil
+import uuid
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+ONNX_MODEL = "model.onnx"
+ONNX_INT8_MODEL = "model.int8.onnx"
+ONNX_META = "docvector_onnx.json"
+
+
+class TorchBackend:
+    """SentenceTransformer PyTorch (comportement historique)"""
+
+    def __init__(self, config):
+        # Import différé : les workers de parsing (spawn) réimportent le
+        # script principal et n'ont pas besoin de torch
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(config.model_name, device=config.device)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=max(len(texts), 1),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+class OnnxBackend:
+    """Transformer exporté en ONNX, exécuté par onnxruntime sur CPU
+
+    Pooling et normalisation reproduisent ceux du SentenceTransformer
+    d'origine. quantized=True utilise la variante int8 (quantification
+    dynamique des poids). L'export est fait une fois dans onnx_dir, sous
+    verrou (les workers gunicorn démarrent ensemble), et refait si le
+    modèle configuré a changé.
+    """
+
+    def __init__(self, config, quantized: bool = False):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError(
+                f"EMBEDDING_BACKEND={config.backend} nécessite onnxruntime (pip install onnxruntime onnx)"
+            )
+        from transformers import AutoTokenizer
+
+        onnx_dir = Path(config.onnx_dir)
+        with _export_lock(onnx_dir):
+            meta = read_onnx_meta(onnx_dir)
+            if meta is not None and meta["model_name"] != config.model_name:
+                logger.warning(f"Export ONNX de {meta['model_name']} dans {onnx_dir}, "
+                               f"ré-export pour {config.model_name}")
+                meta = None
+            if meta is None:
+                export_onnx(config.model_name, onnx_dir)
+                meta = read_onnx_meta(onnx_dir)
+            model_path = onnx_dir / ONNX_MODEL
+            if quantized:
+                model_path = onnx_dir / ONNX_INT8_MODEL
+                if not model_path.exists():
+                    quantize_onnx(onnx_dir)
+
+        if meta["dimension"] != config.dimension:
+            raise ValueError(
+                f"Le modèle ONNX {meta['model_name']} produit des vecteurs de dimension "
+                f"{meta['dimension']}, {config.dimension} attendue"
+            )
+        self.meta = meta
+        self.tokenizer = AutoTokenizer.from_pretrained(str(onnx_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if config.onnx_threads:
+            options.intra_op_num_threads = config.onnx_threads
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"Backend ONNX: {model_path}")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True,
+            max_length=self.meta["max_seq_length"], return_tensors="np"
+        )
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items()
+                  if name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        if self.meta["pooling"] == "cls":
+            embeddings = token_embeddings[:, 0]
+        else:
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.meta["normalize"]:
+            embeddings = embeddings / np.clip(
+                np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None
+            )
+        return embeddings.astype(np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return self.meta["dimension"]
+
+
+def create_backend(config):
+    if config.backend == "torch":
+        return TorchBackend(config)
+    if config.backend == "onnx":
+        return OnnxBackend(config)
+    if config.backend == "onnx-int8":
+        return OnnxBackend(config, quantized=True)
+    raise ValueError(f"Unsupported embedding backend: {config.backend} (choices: {', '.join(BACKENDS)})")
+
+
+def read_onnx_meta(onnx_dir: Path) -> Optional[Dict]:
+    """Métadonnées d'un export complet (écrites en dernier), None sinon"""
+    try:
+        with open(Path(onnx_dir) / ONNX_META, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _export_lock(onnx_dir: Path):
+    """Verrou inter-process sur l'export (fichier voisin de onnx_dir)"""
+    lock_path = onnx_dir.with_name(f"{onnx_dir.name}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def export_onnx(model_name: str, onnx_dir: Path, opset: int = 14):
+    """Exporte le transformer d'un SentenceTransformer (+ tokenizer, pooling) en ONNX
+
+    L'export est écrit dans un répertoire temporaire puis mis en place par
+    renommage : onnx_dir contient un export complet ou l'ancien.
+    """
+    onnx_dir = Path(onnx_dir)
+    onnx_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = onnx_dir.with_name(f".{onnx_dir.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        _export_onnx(model_name, tmp_dir, opset)
+        if onnx_dir.exists():
+            old_dir = onnx_dir.with_name(f".{onnx_dir.name}.{uuid.uuid4().hex}.old")
+            os.replace(onnx_dir, old_dir)
+            os.replace(tmp_dir, onnx_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, onnx_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _export_onnx(model_name: str, onnx_dir: Path, opset: int):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    onnx_dir.mkdir(parents=True)
+    logger.info(f"Export ONNX de {model_name} vers {onnx_dir}...")
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    pooling = next((m for m in st_model if isinstance(m, Pooling)), None)
+    pooling_mode = pooling.get_pooling_mode_str() if pooling is not None else "mean"
+    if pooling_mode not in ("mean", "cls"):
+        raise ValueError(f"Pooling {pooling_mode} non supporté par le backend ONNX")
+
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["DocVector export"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    export_kwargs = {}
+    if "dynamo" in torch.onnx.export.__code__.co_varnames:
+        export_kwargs["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[name] for name in input_names),
+            str(onnx_dir / ONNX_MODEL),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            **export_kwargs
+        )
+
+    tokenizer.save_pretrained(str(onnx_dir))
+    meta = {
+        "model_name": model_name,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length,
+        "pooling": pooling_mode,
+        "normalize": any(isinstance(m, Normalize) for m in st_model)
+    }
+    with open(onnx_dir / ONNX_META, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f"Export ONNX terminé: {meta}")
+
+
+def quantize_onnx(onnx_dir: Path):
+    """Quantification dynamique int8 des poids (MatMul/Gemm)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    onnx_dir = Path(onnx_dir)
+    logger.info(f"Quantification int8 de {onnx_dir / ONNX_MODEL}...")
+    tmp_path = onnx_dir / f".{ONNX_INT8_MODEL}.{uuid.uuid4().hex}.tmp"
+    try:
+        quantize_dynamic(str(onnx_dir / ONNX_MODEL), str(tmp_path), weight_type=QuantType.QInt8)
+        os.replace(tmp_path, onnx_dir / ONNX_INT8_MODEL)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def check_parity(reference, candidate, texts: List[str], min_cosine: float = 0.99) -> Dict:
+    """Compare deux backends sur les mêmes textes (cosinus par texte)"""
+    expected = reference.encode(texts)
+    actual = candidate.encode(texts)
+    if expected.shape != actual.shape:
+        raise ValueError(f"Dimensions incompatibles: {expected.shape} vs {actual.shape}")
+
+    cosines = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    return {
+        "texts": len(texts),
+        "dimension": expected.shape[1],
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+        "ok": bool(cosines.min() >= min_cosine)
+    }
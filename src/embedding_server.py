@@ -0,0 +1,166 @@
+# src/embedding_server.py
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import List, Optional, Union
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+AUTHKEY_ENV = "EMBEDDING_SERVICE_AUTHKEY"
+
+
+def _authkey() -> bytes:
+    """Clé partagée serveur/workers : générée par le master gunicorn avant le
+    fork (on_starting), à fournir explicitement pour un serveur lancé à la main"""
+    key = os.getenv(AUTHKEY_ENV)
+    if not key:
+        raise RuntimeError(f"{AUTHKEY_ENV} non défini : clé d'authentification du serveur d'embeddings requise")
+    return key.encode()
+
+
+class EmbeddingServer:
+    """Process unique propriétaire du modèle, servi sur une socket Unix
+
+    Les workers gunicorn s'y connectent via RemoteEmbeddingGenerator au lieu
+    de charger chacun leur copie du modèle.
+    """
+
+    def __init__(self, config, socket_path: str):
+        from .embeddings import EmbeddingGenerator
+
+        self.config = config
+        self.socket_path = socket_path
+        # Les appels concurrents des workers sont regroupés par le
+        # micro-batching de l'EmbeddingGenerator
+        self.generator = EmbeddingGenerator(config)
+
+    def serve_forever(self):
+        path = Path(self.socket_path)
+        if path.exists():
+            path.unlink()
+
+        listener = Listener(address=self.socket_path, family='AF_UNIX', authkey=_authkey())
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Serveur d'embeddings prêt sur {self.socket_path}")
+
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Connexion refusée: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+    def _handle(self, conn):
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    break
+
+                try:
+                    if request["op"] == "encode":
+                        response = {"ok": True, "embeddings": self.generator.encode_batch(request["texts"])}
+                    elif request["op"] == "info":
+                        response = {
+                            "ok": True,
+                            "dimension": self.generator.dimension,
+                            "model_name": self.config.model_name,
+                            "cache": self.generator.cache_stats()
+                        }
+                    else:
+                        response = {"ok": False, "error": f"Unknown op: {request['op']}"}
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+
+                conn.send(response)
+        finally:
+            conn.close()
+
+
+class RemoteEmbeddingGenerator:
+    """Même interface qu'EmbeddingGenerator, encodage délégué au serveur"""
+
+    def __init__(self, config, connect_timeout: float = 300, reconnect_timeout: float = 60):
+        self.config = config
+        self.socket_path = config.service_socket
+        self.cache = None
+        # Attente max d'un serveur relancé par le master (chargement du modèle)
+        self.reconnect_timeout = reconnect_timeout
+        self._local = threading.local()
+        self._info = None
+        self._call({"op": "info"}, timeout=connect_timeout)
+
+    def encode(self, texts: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        """Génère embeddings"""
+        if isinstance(texts, str):
+            texts = [texts]
+
+        embeddings = self.encode_batch(texts)
+
+        if len(texts) == 1:
+            return embeddings[0].tolist()
+        return embeddings.tolist()
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return self._call({"op": "encode", "texts": list(texts)})["embeddings"]
+
+    def cache_stats(self) -> Optional[dict]:
+        return self._call({"op": "info"})["cache"]
+
+    @property
+    def dimension(self) -> int:
+        if self._info is None:
+            self._info = self._call({"op": "info"})
+        return self._info["dimension"]
+
+    def _call(self, request: dict, timeout: Optional[float] = None) -> dict:
+        """Une connexion par thread (workers gthread) ; connexion perdue :
+        reconnexion immédiate, puis attente du serveur (relancé par le
+        master) jusqu'à timeout"""
+        deadline = None
+        while True:
+            conn = getattr(self._local, "conn", None)
+            try:
+                if conn is None:
+                    conn = Client(address=self.socket_path, family='AF_UNIX', authkey=_authkey())
+                    self._local.conn = conn
+                conn.send(request)
+                response = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._local.conn = None
+                if deadline is None:
+                    deadline = time.monotonic() + (self.reconnect_timeout if timeout is None else timeout)
+                elif time.monotonic() > deadline:
+                    raise
+                else:
+                    time.sleep(0.5)
+
+        if not response["ok"]:
+            raise RuntimeError(f"Embedding server: {response['error']}")
+        return response
+
+
+def run_server(socket_path: Optional[str] = None):
+    """Point d'entrée du process serveur (gunicorn on_starting ou CLI)"""
+    from .config import EmbeddingConfig
+
+    logging.basicConfig(level=logging.INFO)
+    config = EmbeddingConfig()
+    EmbeddingServer(config, socket_path or config.service_socket).serve_forever()
+
+
+if __name__ == "__main__":
+    run_server()
@@ -1,29 +1,130 @@
 # src/embeddings.py
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Union
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Optional, Union
 import logging
+import queue
+import threading
+import time
+
+from .embedding_backends import create_backend
+from .embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
+class MicroBatcher:
+    """Regroupe les appels d'encodage concurrents en un seul batch modèle
+
+    Le premier appel ouvre une fenêtre de max_wait_ms ; les appels arrivés
+    entre-temps (jusqu'à max_batch textes) partent dans le même forward pass
+    et chaque appelant récupère ses propres vecteurs.
+    """
+
+    def __init__(self, encode_fn, max_batch: int = 32, max_wait_ms: float = 2):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> np.ndarray:
+        future = Future()
+        self._requests.put((texts, future))
+        return future.result()
+
+    def _loop(self):
+        while True:
+            requests = [self._requests.get()]
+            total = len(requests[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            while total < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                total += len(request[0])
+
+            texts = [text for request_texts, _ in requests for text in request_texts]
+            try:
+                embeddings = self.encode_fn(texts)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for request_texts, future in requests:
+                future.set_result(embeddings[start:start + len(request_texts)])
+                start += len(request_texts)
+
+
 class EmbeddingGenerator:
     def __init__(self, config):
         self.config = config
-        logger.info(f"Chargement du modèle {config.model_name}...")
-        self.model = SentenceTransformer(config.model_name, device=config.device)
+        logger.info(f"Chargement du modèle {config.model_name} (backend {config.backend})...")
+        self.backend = create_backend(config)
         logger.info("Modèle chargé")
         
+        self.cache: Optional[EmbeddingCache] = None
+        if config.cache_enabled:
+            # Vecteurs ONNX/int8 légèrement différents : espace de cache séparé
+            cache_model = config.model_name if config.backend == "torch" else f"{config.model_name}@{config.backend}"
+            self.cache = EmbeddingCache(
+                Path(config.cache_path), cache_model, config.cache_max_entries
+            )
+        
+        self.batcher: Optional[MicroBatcher] = None
+        if config.batch_window_ms > 0:
+            self.batcher = MicroBatcher(self._encode_model, config.batch_max, config.batch_window_ms)
+        
     def encode(self, texts: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
         """Génère embeddings"""
         if isinstance(texts, str):
             texts = [texts]
             
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        embeddings = self.encode_batch(texts)
         
         if len(texts) == 1:
             return embeddings[0].tolist()
         return embeddings.tolist()
     
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode un batch complet en un seul appel au modèle (textes absents du cache)"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        if self.cache is None:
+            return self._encode(texts)
+        
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        
+        if missing:
+            computed = self._encode([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                cached[i] = vector
+        
+        return np.vstack(cached).astype(np.float32, copy=False)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        # Petits appels (requêtes) regroupés ; les batches d'ingestion passent directement
+        if self.batcher is not None and len(texts) < self.batcher.max_batch:
+            return self.batcher.submit(texts)
+        return self._encode_model(texts)
+    
+    def _encode_model(self, texts: List[str]) -> np.ndarray:
+        return self.backend.encode(texts)
+    
+    def cache_stats(self) -> Optional[dict]:
+        return self.cache.stats() if self.cache is not None else None
+    
     @property
     def dimension(self) -> int:
-        return self.model.get_sentence_embedding_dimension()
\ No newline at end of file
+        return self.backend.dimension
\ No newline at end of file
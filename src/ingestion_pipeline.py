@@ -1,111 +1,646 @@
 # src/ingestion_pipeline.py
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
 import hashlib
 from datetime import datetime
 import logging
+import multiprocessing
+import queue
+import threading
+import time
 from tqdm import tqdm
 
-from .parsers.document_parser import DocumentParser
-from .parsers.markdown_parser import MarkdownParser
-from .parsers.code_parser import CodeParser
-from .parsers.devops_parser import DevOpsParser
+from . import metrics
 from .chunker import TextChunker
+from .dedup import DEDUP_MODES, MAX_NEAR_DISTANCE, NEW, ChunkDeduplicator
 from .embeddings import EmbeddingGenerator
 from .opensearch_client import OpenSearchClient
+from .manifest import IngestionManifest, file_hash
+from .parse_workers import (
+    EVENT_CHECK, EVENT_CHUNKS, EVENT_DONE, EVENT_ERROR, EVENT_EXIT,
+    build_parsers, close_parsers, get_parser, iter_file_events, parse_and_chunk, parse_worker,
+    pdf_workers_per_process
+)
 
 logger = logging.getLogger(__name__)
 
 class IngestionPipeline:
-    def __init__(self, os_client: OpenSearchClient, embedder: EmbeddingGenerator, chunker: TextChunker):
+    def __init__(self, os_client: OpenSearchClient, embedder: EmbeddingGenerator, chunker: TextChunker,
+                 embed_batch_size: int = 64, workers: int = 1, queue_size: int = 8,
+                 manifest: IngestionManifest = None, dedup: str = "off", dedup_max_distance: int = 3):
+        if dedup not in DEDUP_MODES:
+            raise ValueError(f"Unsupported dedup mode: {dedup}")
+        if dedup == "near" and not 0 <= dedup_max_distance <= MAX_NEAR_DISTANCE:
+            raise ValueError(
+                f"Unsupported near-duplicate distance: {dedup_max_distance} (expected 0 to {MAX_NEAR_DISTANCE})"
+            )
         self.os_client = os_client
         self.embedder = embedder
         self.chunker = chunker
-        
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.manifest = manifest
+        # Déduplication des chunks : off | exact (hash du texte normalisé) | near (+ SimHash)
+        self.dedup = dedup
+        self.dedup_max_distance = dedup_max_distance
+        self.stats = {}
+        self._created_at = {}
+        self._dedup: Optional[ChunkDeduplicator] = None
+        # Documents partagés à réécrire en fin d'ingestion : id -> {"document", "refs"}
+        self._shared: Dict[str, Dict] = {}
+
         # Mapping extensions -> parsers
-        self.parsers = {
-            'document': DocumentParser(),
-            'markdown': MarkdownParser(),
-            'code': CodeParser(),
-            'devops': DevOpsParser()
-        }
-    
-    def process_directory(self, directory: Path, batch_size: int = 50):
-        """Process tous les fichiers d'un répertoire"""
+        self.parsers = build_parsers()
+
+    def process_directory(self, directory: Path, batch_size: int = 50,
+                          incremental: bool = False, prune_missing: bool = True,
+                          progress: Optional[Callable[[Dict], None]] = None):
+        """Process tous les fichiers d'un répertoire
+
+        Avec un manifest, les chunk ids de chaque fichier sont mémorisés et
+        les chunks orphelins supprimés ; en mode incrémental les fichiers
+        inchangés sont ignorés. prune_missing supprime les chunks des
+        fichiers du répertoire qui ont disparu.
+        """
         files = list(directory.rglob('*'))
         files = [f for f in files if f.is_file()]
-        
-        logger.info(f"Trouvé {len(files)} fichiers à traiter")
-        
+
+        self._reset_stats(len(files))
+        if self.manifest is not None:
+            # Un autre process (worker gunicorn, CLI) a pu l'écrire
+            self.manifest.load()
+            if prune_missing:
+                self._prune_removed(directory, files)
+
+        return self._process(files, batch_size, incremental, progress)
+
+    def process_files(self, files: List[Path], batch_size: int = 50, incremental: bool = False,
+                      progress: Optional[Callable[[Dict], None]] = None):
+        """Process une liste de fichiers (sans suppression des absents)"""
+        self._reset_stats(len(files))
+        if self.manifest is not None:
+            self.manifest.load()
+
+        return self._process(files, batch_size, incremental, progress)
+
+    def _reset_stats(self, files_found: int):
+        self.stats = {
+            "files_found": files_found,
+            "files_skipped": 0,
+            "files_processed": 0,
+            "files_failed": 0,
+            "chunks_embedded": 0,
+            "documents_indexed": 0,
+            "documents_deleted": 0,
+            "documents_rewritten": 0,
+            "dedup": None,
+            "errors": [],
+            # Temps par étage : attente du parsing, embedding, attente de
+            # l'indexation (backpressure) et travail du thread d'indexation
+            "stage_seconds": {"parse": 0.0, "embed": 0.0, "index_wait": 0.0, "index": 0.0}
+        }
+        self._shared = {}
+
+    def _record_error(self, message: str):
+        # Borné : un job de 100k fichiers cassés ne doit pas exploser la progression
+        if len(self.stats["errors"]) < 100:
+            self.stats["errors"].append(message)
+
+    def _process(self, files: List[Path], batch_size: int, incremental: bool,
+                 progress: Optional[Callable[[Dict], None]]) -> int:
+        """Trois étages qui se recouvrent : parse/chunk (pool de process),
+        embedding (thread courant) et indexation bulk (thread dédié),
+        reliés par des queues bornées.
+        """
+        file_hashes = {}
+        if self.manifest is not None:
+            files, file_hashes = self._select_files(files, incremental)
+
+        logger.info(f"Trouvé {len(files)} fichiers à traiter ({self.workers} workers)")
+        self._dedup = self._create_deduplicator()
+
+        index_queue = queue.Queue(maxsize=self.queue_size)
+        indexer = _IndexStage(self.os_client, index_queue, self.stats)
+        indexer.start()
+
+        # Chunks en attente d'embedding (tous fichiers confondus)
+        pending = []
         batch = []
-        total_indexed = 0
-        
-        for file_path in tqdm(files, desc="Ingestion"):
-            try:
-                documents = self.process_file(file_path)
-                batch.extend(documents)
-                
-                if len(batch) >= batch_size:
-                    result = self.os_client.bulk_index(batch)
-                    total_indexed += result['success']
+        file_chunk_ids = {}
+        # Chunks déjà émis par les fichiers en échec (en partie embeddés/indexés)
+        failed_chunk_ids = {}
+        completed = []
+        progress_bar = tqdm(total=len(files), desc="Ingestion")
+
+        timings = self.stats["stage_seconds"]
+        try:
+            events = self._iter_events(files)
+            while True:
+                started = time.perf_counter()
+                event, key, payload = next(events, (None, None, None))
+                timings["parse"] += time.perf_counter() - started
+                if event is None:
+                    break
+
+                if event == EVENT_CHUNKS:
+                    chunk_ids = file_chunk_ids.setdefault(key, [])
+                    documents = self._build_documents(Path(key), payload, len(chunk_ids))
+                    unique = self._deduplicate(documents, len(chunk_ids)) if self._dedup else documents
+                    chunk_ids.extend(doc["chunk_id"] for doc in documents)
+                    pending.extend(unique)
+
+                    # Batches d'embedding de taille fixe
+                    while len(pending) >= self.embed_batch_size:
+                        embed_batch = pending[:self.embed_batch_size]
+                        pending = pending[self.embed_batch_size:]
+                        batch.extend(self._embed_documents(embed_batch))
+
+                        if len(batch) >= batch_size:
+                            self._enqueue(index_queue, batch)
+                            batch = []
+
+                elif event == EVENT_DONE:
+                    completed.append(key)
+                    self.stats["files_processed"] += 1
+                    progress_bar.update(1)
+
+                elif event == EVENT_ERROR:
+                    logger.error(f"Erreur traitement {key}: {payload}")
+                    self._record_error(f"{key}: {payload}")
+                    parent_doc_id = self._parent_doc_id(Path(key))
+                    pending = [d for d in pending if d["metadata"]["parent_doc_id"] != parent_doc_id]
+                    failed_chunk_ids[key] = file_chunk_ids.pop(key, [])
+                    self.stats["files_failed"] += 1
+                    progress_bar.update(1)
+
+                if progress is not None:
+                    progress(dict(self.stats))
+
+            # Derniers chunks
+            if pending:
+                batch.extend(self._embed_documents(pending))
+            if batch:
+                self._enqueue(index_queue, batch)
+        finally:
+            index_queue.put(None)
+            indexer.join()
+            timings["index"] = indexer.busy_seconds
+            for stage, seconds in timings.items():
+                metrics.STAGE_SECONDS.labels(stage).inc(seconds)
+            progress_bar.close()
+            self._created_at = {}
+
+        if self.manifest is not None:
+            self._update_manifest(completed, file_chunk_ids, file_hashes, indexer.failed_ids,
+                                  failed_chunk_ids)
+        if self._shared:
+            self._rewrite_shared(completed)
+        if self._dedup is not None:
+            self.stats["dedup"] = self._dedup.summary()
+            logger.info(f"Déduplication: {self.stats['dedup']}")
+        if progress is not None:
+            progress(dict(self.stats))
+
+        logger.info(f"Total indexé: {indexer.total_indexed} documents")
+        return indexer.total_indexed
+
+    def _create_deduplicator(self) -> Optional[ChunkDeduplicator]:
+        if self.dedup == "off":
+            return None
+        # Chunks déjà indexés (autres fichiers, version précédente d'un fichier modifié)
+        known_ids = set(self._manifest_references()) if self.manifest is not None else ()
+        return ChunkDeduplicator(near_duplicates=self.dedup == "near",
+                                 max_distance=self.dedup_max_distance, known_ids=known_ids)
+
+    def _deduplicate(self, documents: List[Dict], start: int) -> List[Dict]:
+        """Chunk id = empreinte du contenu ; seuls les contenus nouveaux sont embeddés
+
+        Les doublons (exacts, proches, ou déjà indexés) ne sont pas embeddés :
+        leur référence est ajoutée aux sources du document canonique, réécrit
+        en fin d'ingestion.
+        """
+        unique = []
+        for position, doc in enumerate(documents, start):
+            doc["chunk_id"], outcome = self._dedup.resolve(doc["content"])
+            source = {
+                "file_path": doc["metadata"]["file_path"],
+                "file_name": doc["metadata"]["file_name"],
+                "position": position
+            }
+            doc["sources"] = [source]
+            if outcome == NEW:
+                unique.append(doc)
+            else:
+                shared = self._shared.setdefault(doc["chunk_id"], {"document": None, "refs": []})
+                # Repli si le canonique n'est pas dans l'index (fichier en échec)
+                shared["document"] = shared["document"] or doc
+                shared["refs"].append(source)
+        return unique
+
+    def _manifest_references(self) -> Dict[str, List[Dict]]:
+        """chunk id -> sources, d'après le manifest (position = rang du chunk dans le fichier)"""
+        references: Dict[str, List[Dict]] = {}
+        for path, entry in self.manifest.files.items():
+            name = Path(path).name
+            for position, chunk_id in enumerate(entry["chunk_ids"]):
+                references.setdefault(chunk_id, []).append(
+                    {"file_path": path, "file_name": name, "position": position}
+                )
+        return references
+
+    def _release_chunks(self, chunk_ids: List[str]) -> List[str]:
+        """Chunks à supprimer ; avec la dédup, ceux encore référencés sont réécrits"""
+        if self.dedup == "off" or self.manifest is None:
+            return chunk_ids
+        references = self._manifest_references()
+        for chunk_id in chunk_ids:
+            if chunk_id in references:
+                self._shared.setdefault(chunk_id, {"document": None, "refs": []})
+        return [chunk_id for chunk_id in chunk_ids if chunk_id not in references]
+
+    def _rewrite_shared(self, completed: List[str]):
+        """Réécrit les documents partagés avec leur liste de sources complète
+
+        Le document est relu sans vecteur (ou repris du doublon rencontré s'il
+        n'est pas dans l'index), ré-embeddé (cache d'embeddings) et réindexé.
+        Les sources viennent du manifest, sinon des références de ce run.
+        """
+        chunk_ids = list(self._shared)
+        existing = self.os_client.get_documents(chunk_ids)
+        references = self._manifest_references() if self.manifest is not None else None
+        completed = set(completed)
+
+        documents = []
+        for chunk_id in chunk_ids:
+            shared = self._shared[chunk_id]
+            doc = existing.get(chunk_id) or shared["document"]
+            if doc is None:
+                continue
+            if references is not None:
+                sources = references.get(chunk_id, [])
+            else:
+                sources = {(s["file_path"], s["position"]): s for s in existing.get(chunk_id, {}).get("sources", [])}
+                for source in shared["refs"]:
+                    if source["file_path"] in completed:
+                        sources[(source["file_path"], source["position"])] = source
+                sources = list(sources.values())
+            if not sources:
+                continue
+            documents.append({
+                **{k: v for k, v in doc.items() if k != "embedding"},
+                "chunk_id": chunk_id,
+                "sources": sources
+            })
+
+        for i in range(0, len(documents), self.embed_batch_size):
+            self._embed_documents(documents[i:i + self.embed_batch_size])
+        result = self.os_client.stream_index(documents)
+        self.stats["documents_rewritten"] += result["success"]
+        logger.info(f"Documents partagés réécrits: {result['success']}")
+        self._shared = {}
+
+    def reindex(self, source_index: Optional[str] = None,
+                progress: Optional[Callable[[Dict], None]] = None) -> int:
+        """Ré-embedding des documents d'un index vers l'index d'écriture
+
+        Contenu et metadata sont relus sans les vecteurs (absents du _source)
+        puis ré-encodés : changement de modèle, d'encodage ou de profil
+        d'index sans repasser par les fichiers sources. Les chunk ids sont
+        conservés, le manifest reste valide.
+        """
+        self._reset_stats(0)
+        index_queue = queue.Queue(maxsize=self.queue_size)
+        indexer = _IndexStage(self.os_client, index_queue, self.stats)
+        indexer.start()
+
+        timings = self.stats["stage_seconds"]
+        batch = []
+        try:
+            documents = self.os_client.iter_documents(source_index)
+            while True:
+                # Lecture (scroll) comptée comme l'étage parse
+                started = time.perf_counter()
+                doc = next(documents, None)
+                timings["parse"] += time.perf_counter() - started
+                if doc is None:
+                    break
+
+                batch.append(doc)
+                if len(batch) >= self.embed_batch_size:
+                    self._enqueue(index_queue, self._embed_documents(batch))
                     batch = []
-                    
-            except Exception as e:
-                logger.error(f"Erreur traitement {file_path}: {e}")
-        
-        # Dernier batch
-        if batch:
-            result = self.os_client.bulk_index(batch)
-            total_indexed += result['success']
-        
-        logger.info(f"Total indexé: {total_indexed} documents")
-        return total_indexed
-    
+                    if progress is not None:
+                        progress(dict(self.stats))
+            if batch:
+                self._enqueue(index_queue, self._embed_documents(batch))
+        finally:
+            index_queue.put(None)
+            indexer.join()
+            timings["index"] = indexer.busy_seconds
+
+        if indexer.failed_ids:
+            self._record_error(f"{len(indexer.failed_ids)} documents non réindexés (dead-letter)")
+        logger.info(f"Réindexés: {indexer.total_indexed} documents")
+        return indexer.total_indexed
+
+    def _enqueue(self, index_queue: queue.Queue, batch: List[Dict]):
+        started = time.perf_counter()
+        index_queue.put(batch)
+        self.stats["stage_seconds"]["index_wait"] += time.perf_counter() - started
+
+    def _select_files(self, files: List[Path], incremental: bool) -> Tuple[List[Path], Dict[str, str]]:
+        """Fichiers à (ré)ingérer et leur hash de contenu"""
+        selected = []
+        file_hashes = {}
+
+        for file_path in files:
+            try:
+                if incremental:
+                    content_hash = self.manifest.changed_hash(file_path)
+                    if content_hash is None:
+                        self.stats["files_skipped"] += 1
+                        continue
+                else:
+                    content_hash = file_hash(file_path)
+            except OSError as e:
+                logger.error(f"Erreur lecture {file_path}: {e}")
+                self._record_error(f"{file_path}: {e}")
+                self.stats["files_failed"] += 1
+                continue
+
+            key = str(file_path)
+            file_hashes[key] = content_hash
+            entry = self.manifest.get(file_path)
+            if entry is not None:
+                # Conserve la date de première ingestion
+                self._created_at[key] = entry["created_at"]
+            selected.append(file_path)
+
+        if incremental:
+            logger.info(f"Incrémental: {self.stats['files_skipped']} fichiers inchangés ignorés")
+        return selected, file_hashes
+
+    def _prune_removed(self, directory: Path, files: List[Path]):
+        """Supprime de l'index les chunks des fichiers disparus"""
+        present = {str(f) for f in files}
+        removed = [p for p in self.manifest.paths_under(directory) if p not in present]
+        if not removed:
+            return
+
+        chunk_ids = []
+        for path in removed:
+            chunk_ids.extend(self.manifest.remove(path))
+
+        logger.info(f"{len(removed)} fichiers supprimés, {len(chunk_ids)} chunks à retirer")
+        self.stats["documents_deleted"] += self.os_client.delete_documents(self._release_chunks(chunk_ids))
+        self.manifest.save()
+
+    def _update_manifest(self, completed: List[str], file_chunk_ids: Dict[str, List[str]],
+                         file_hashes: Dict[str, str], failed_ids: set,
+                         failed_chunk_ids: Dict[str, List[str]]):
+        """Enregistre les fichiers indexés et retire leurs chunks orphelins
+
+        Un fichier en échec (ou indexé en partie) garde son entrée
+        précédente : ses chunks déjà indexés qui n'y figurent pas ne seraient
+        suivis par personne et sont supprimés.
+        """
+        orphans = []
+        failed_chunk_ids = dict(failed_chunk_ids)
+
+        for key in completed:
+            chunk_ids = file_chunk_ids.get(key, [])
+            if failed_ids.intersection(chunk_ids):
+                # Réessayé au prochain run
+                logger.warning(f"Indexation partielle de {key}, non enregistré dans le manifest")
+                failed_chunk_ids[key] = chunk_ids
+                continue
+
+            file_path = Path(key)
+            previous = self.manifest.get(file_path)
+            if previous is not None:
+                orphans.extend(set(previous["chunk_ids"]) - set(chunk_ids))
+
+            created_at = previous["created_at"] if previous else datetime.now().isoformat()
+            try:
+                self.manifest.update(file_path, file_hashes[key], chunk_ids, created_at)
+            except OSError as e:
+                logger.warning(f"Manifest non mis à jour pour {key}: {e}")
+
+        for key, chunk_ids in failed_chunk_ids.items():
+            previous = self.manifest.get(Path(key))
+            orphans.extend(set(chunk_ids) - set(previous["chunk_ids"] if previous else ()))
+
+        orphans = self._release_chunks(list(set(orphans)))
+        if orphans:
+            logger.info(f"Suppression de {len(orphans)} chunks orphelins")
+            self.stats["documents_deleted"] += self.os_client.delete_documents(orphans)
+
+        self.manifest.save()
+
     def process_file(self, file_path: Path) -> List[Dict]:
-        """Process un fichier"""
-        parser = self._get_parser(file_path)
-        
-        # 1. Parse
-        raw_chunks = parser.parse(file_path)
-        
-        # 2. Chunk
-        all_chunks = []
-        for raw_chunk in raw_chunks:
-            chunks = self.chunker.chunk_text(raw_chunk["text"], raw_chunk["metadata"])
-            all_chunks.extend(chunks)
-        
-        # 3. Embeddings + metadata enrichie
+        """Process un fichier (documents embeddés en mémoire, cf. iter_process_file)"""
+        return list(self.iter_process_file(file_path))
+
+    def iter_process_file(self, file_path: Path) -> Iterator[Dict]:
+        """Documents embeddés d'un fichier, par batches de embed_batch_size"""
+        batch: List[Dict] = []
+        start = 0
+        try:
+            for chunk in parse_and_chunk(self.parsers, self.chunker, file_path):
+                batch.append(chunk)
+                if len(batch) >= self.embed_batch_size:
+                    yield from self._embed_documents(self._build_documents(file_path, batch, start))
+                    start += len(batch)
+                    batch = []
+
+            if batch:
+                yield from self._embed_documents(self._build_documents(file_path, batch, start))
+        finally:
+            close_parsers(self.parsers)
+
+    def _iter_events(self, files: List[Path]) -> Iterator[Tuple[str, str, object]]:
+        """Flux d'événements parse/chunk, en process ou via le pool"""
+        if self.workers <= 1 or len(files) <= 1:
+            try:
+                for file_path in files:
+                    yield from iter_file_events(self.parsers, self.chunker, file_path, self.embed_batch_size)
+            finally:
+                # Pas de pool d'extraction PDF inactif entre deux ingestions
+                close_parsers(self.parsers)
+            return
+
+        # spawn : pas de fork d'un process qui a déjà chargé torch
+        ctx = multiprocessing.get_context("spawn")
+        file_queue = ctx.Queue()
+        event_queue = ctx.Queue(maxsize=self.queue_size)
+
+        n_workers = min(self.workers, len(files))
+        pdf_workers = pdf_workers_per_process(n_workers)
+        for file_path in files:
+            file_queue.put(str(file_path))
+        for _ in range(n_workers):
+            file_queue.put(None)
+
+        processes = [
+            ctx.Process(
+                target=parse_worker,
+                args=(file_queue, event_queue, self.chunker, self.embed_batch_size, pdf_workers, worker_id),
+                daemon=False
+            )
+            for worker_id in range(n_workers)
+        ]
+        for process in processes:
+            process.start()
+
+        running = set(range(n_workers))
+        # Fichiers sans DONE/ERROR : en échec si un worker meurt (fichier en
+        # cours, événements non vidés par un process tué, fichiers restés en queue)
+        outstanding = dict.fromkeys(str(f) for f in files)
+        exit_codes = []
+        checking = set()
+        last_check = time.monotonic()
+        try:
+            while running:
+                try:
+                    event = event_queue.get(timeout=1)
+                except queue.Empty:
+                    event = None
+
+                if event is not None:
+                    kind, key, payload = event
+                    if kind == EVENT_EXIT:
+                        running.discard(payload)
+                    elif kind == EVENT_CHECK:
+                        checking.discard(payload)
+                        if payload in running:
+                            running.discard(payload)
+                            exit_codes.append(processes[payload].exitcode)
+                            logger.error(f"Worker de parsing {payload} arrêté (code {exit_codes[-1]})")
+                    else:
+                        if kind in (EVENT_DONE, EVENT_ERROR):
+                            outstanding.pop(key, None)
+                        yield event
+
+                if time.monotonic() - last_check >= 1:
+                    last_check = time.monotonic()
+                    for worker_id in running - checking:
+                        if processes[worker_id].is_alive():
+                            continue
+                        # Marqueur derrière tout ce que le worker a pu émettre
+                        try:
+                            event_queue.put_nowait((EVENT_CHECK, None, worker_id))
+                            checking.add(worker_id)
+                        except queue.Full:
+                            pass
+
+            for key in outstanding:
+                yield EVENT_ERROR, key, f"non traité : worker de parsing arrêté (code {exit_codes})"
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+    def _build_documents(self, file_path: Path, chunks: List[Dict], start: int) -> List[Dict]:
+        """Documents (sans embedding) pour des chunks consécutifs d'un fichier"""
+        parent_doc_id = self._parent_doc_id(file_path)
+        created_at = self._created_at.get(str(file_path)) or datetime.now().isoformat()
+
         documents = []
-        for idx, chunk in enumerate(all_chunks):
-            embedding = self.embedder.encode(chunk["text"])
-            
+        for idx, chunk in enumerate(chunks, start):
             doc = {
                 "chunk_id": self._generate_id(file_path, idx),
                 "content": chunk["text"],
-                "embedding": embedding,
                 "metadata": {
                     **chunk["metadata"],
-                    "parent_doc_id": hashlib.md5(str(file_path).encode()).hexdigest(),
-                    "created_at": datetime.now().isoformat()
+                    "parent_doc_id": parent_doc_id,
+                    "created_at": created_at
                 }
             }
-            
+
             documents.append(doc)
-        
+
+        return documents
+
+    def _embed_documents(self, documents: List[Dict]) -> List[Dict]:
+        """Embeddings d'un batch de documents en un seul appel modèle"""
+        if not documents:
+            return documents
+
+        started = time.perf_counter()
+        vectors = self.embedder.encode_batch([doc["content"] for doc in documents])
+        elapsed = time.perf_counter() - started
+        # Quantifiés et arrondis selon l'encodage de l'index (payload bulk compact)
+        embeddings = self.os_client.encode_vectors(vectors)
+        for doc, embedding in zip(documents, embeddings):
+            doc["embedding"] = embedding
+        self.stats["chunks_embedded"] = self.stats.get("chunks_embedded", 0) + len(documents)
+        if "stage_seconds" in self.stats:
+            self.stats["stage_seconds"]["embed"] += elapsed
+        metrics.EMBED_BATCH_SECONDS.observe(elapsed)
+        metrics.EMBED_BATCH_SIZE.observe(len(documents))
+
         return documents
-    
+
     def _get_parser(self, file_path: Path):
         """Sélection parser selon extension"""
-        ext = file_path.suffix.lower()
-        
-        if ext in ['.md', '.markdown']:
-            return self.parsers['markdown']
-        elif ext in ['.py', '.java', '.js', '.ts', '.go', '.rb']:
-            return self.parsers['code']
-        elif ext in ['.yml', '.yaml'] or 'jenkinsfile' in file_path.name.lower():
-            return self.parsers['devops']
-        else:
-            return self.parsers['document']
-    
+        return get_parser(self.parsers, file_path)
+
+    def _parent_doc_id(self, file_path: Path) -> str:
+        return hashlib.md5(str(file_path).encode()).hexdigest()
+
     def _generate_id(self, file_path: Path, chunk_idx: int) -> str:
-        return hashlib.md5(f"{file_path}_{chunk_idx}".encode()).hexdigest()
\ No newline at end of file
+        return hashlib.md5(f"{file_path}_{chunk_idx}".encode()).hexdigest()
+
+
+class _IndexStage(threading.Thread):
+    """Etage d'indexation : flux des documents embeddés vers le bulk en streaming"""
+
+    def __init__(self, os_client: OpenSearchClient, index_queue: queue.Queue, stats: Dict):
+        super().__init__(name="ingest-indexer", daemon=True)
+        self.os_client = os_client
+        self.index_queue = index_queue
+        self.stats = stats
+        self.total_indexed = 0
+        self.failed_ids = set()
+        self._unresolved = set()
+        self._finished = False
+        self._wait_seconds = 0.0
+        self.busy_seconds = 0.0
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            self.os_client.stream_index(self._documents(), on_result=self._on_result)
+        except Exception as e:
+            logger.error(f"Erreur indexation bulk: {e}")
+            self.failed_ids.update(self._unresolved)
+        finally:
+            # Débloque l'étage d'embedding si le flux s'est arrêté en route
+            while not self._finished:
+                batch = self.index_queue.get()
+                if batch is None:
+                    break
+                self.failed_ids.update(doc["chunk_id"] for doc in batch)
+            self.busy_seconds = time.perf_counter() - started - self._wait_seconds
+
+    def _documents(self):
+        while True:
+            waiting = time.perf_counter()
+            batch = self.index_queue.get()
+            self._wait_seconds += time.perf_counter() - waiting
+            if batch is None:
+                self._finished = True
+                return
+            for doc in batch:
+                self._unresolved.add(doc["chunk_id"])
+                yield doc
+
+    def _on_result(self, ok: bool, chunk_id: str):
+        self._unresolved.discard(chunk_id)
+        if ok:
+            self.total_indexed += 1
+            self.stats["documents_indexed"] = self.total_indexed
+        else:
+            self.failed_ids.add(chunk_id)
@@ -0,0 +1,254 @@
+# src/jobs.py
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class JobStore:
+    """Queue de jobs persistée (SQLite), partagée entre process
+
+    Le claim se fait dans une transaction IMMEDIATE : un job n'est pris que
+    par un seul worker, même avec plusieurs workers gunicorn.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, type TEXT NOT NULL, status TEXT NOT NULL,"
+            " params TEXT NOT NULL, progress TEXT, result TEXT, error TEXT,"
+            " owner TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    def submit(self, job_type: str, params: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, type, status, params, progress, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, job_type, STATUS_QUEUED, json.dumps(params), json.dumps({}), time.time())
+            )
+        return job_id
+
+    def claim(self, owner: str, exclusive: bool = False) -> Optional[Dict]:
+        """Prend le plus ancien job en attente
+
+        exclusive : rien n'est pris tant qu'un job tourne (tous process
+        confondus), les ingestions partageant index et manifest.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if exclusive and self.conn.execute(
+                    "SELECT 1 FROM jobs WHERE status = ? LIMIT 1", (STATUS_RUNNING,)
+                ).fetchone():
+                    self.conn.execute("COMMIT")
+                    return None
+
+                row = self.conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (STATUS_QUEUED,)
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+
+                now = time.time()
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, attempts = attempts + 1,"
+                    " started_at = ?, heartbeat = ? WHERE id = ?",
+                    (STATUS_RUNNING, owner, now, now, row["id"])
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def heartbeat(self, job_ids: List[str]):
+        if not job_ids:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ?",
+                [(now, job_id, STATUS_RUNNING) for job_id in job_ids]
+            )
+
+    def update_progress(self, job_id: str, progress: Dict):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET progress = ?, heartbeat = ? WHERE id = ?",
+                (json.dumps(progress), time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (STATUS_FAILED if error else STATUS_DONE,
+                 json.dumps(result) if result is not None else None,
+                 error, time.time(), job_id)
+            )
+
+    def requeue_stale(self, lease_seconds: float, max_attempts: int) -> int:
+        """Remet en attente les jobs dont le worker ne donne plus signe de vie"""
+        limit = time.time() - lease_seconds
+        with self._lock:
+            failed = self.conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?"
+                " WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+                (STATUS_FAILED, "Worker lost, max attempts reached", time.time(),
+                 STATUS_RUNNING, limit, max_attempts)
+            ).rowcount
+            requeued = self.conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL WHERE status = ? AND heartbeat < ?",
+                (STATUS_QUEUED, STATUS_RUNNING, limit)
+            ).rowcount
+        if requeued or failed:
+            logger.warning(f"Jobs orphelins: {requeued} remis en attente, {failed} en échec")
+        return requeued
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 20, statuses: Optional[List[str]] = None) -> List[Dict]:
+        query = "SELECT * FROM jobs"
+        args: list = []
+        if statuses:
+            query += f" WHERE status IN ({','.join('?' * len(statuses))})"
+            args.extend(statuses)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self.conn.execute(query, args).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _to_dict(self, row) -> Dict:
+        job = dict(row)
+        for field in ("params", "progress", "result"):
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+
+class JobManager:
+    """Workers (threads) qui exécutent les jobs de la JobStore
+
+    runner(params, report) exécute un job et retourne son résultat ; report
+    publie la progression (écritures limitées à une par progress_interval).
+    """
+
+    def __init__(self, store: JobStore, runner: Callable[[Dict, Callable[[Dict], None]], Dict],
+                 workers: int = 1, poll_interval: float = 1.0, lease_seconds: float = 120,
+                 max_attempts: int = 3, progress_interval: float = 1.0, exclusive: bool = True):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.progress_interval = progress_interval
+        self.exclusive = exclusive
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[str, str] = {}
+        self._running_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        self.store.requeue_stale(self.lease_seconds, self.max_attempts)
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        logger.info(f"JobManager démarré ({self.workers} workers, owner {self.owner})")
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim(self.owner, exclusive=self.exclusive)
+            except Exception as e:
+                logger.error(f"Erreur claim job: {e}")
+                job = None
+
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            self._run(job)
+
+    def _run(self, job: Dict):
+        job_id = job["id"]
+        with self._running_lock:
+            self._running[job_id] = job["type"]
+        logger.info(f"Job {job_id} ({job['type']}) démarré, tentative {job['attempts']}")
+
+        last_report = [0.0]
+
+        def report(progress: Dict, force: bool = False):
+            now = time.monotonic()
+            if force or now - last_report[0] >= self.progress_interval:
+                last_report[0] = now
+                try:
+                    self.store.update_progress(job_id, progress)
+                except Exception as e:
+                    logger.warning(f"Progression job {job_id} non enregistrée: {e}")
+
+        try:
+            result = self.runner(job["params"], report)
+            self.store.finish(job_id, result=result)
+            logger.info(f"Job {job_id} terminé")
+        except Exception as e:
+            logger.error(f"Job {job_id} en échec: {e}")
+            self.store.finish(job_id, error=str(e))
+        finally:
+            with self._running_lock:
+                self._running.pop(job_id, None)
+
+    def _heartbeat(self):
+        interval = max(1.0, self.lease_seconds / 4)
+        while not self._stop.wait(interval):
+            with self._running_lock:
+                job_ids = list(self._running)
+            try:
+                self.store.heartbeat(job_ids)
+                self.store.requeue_stale(self.lease_seconds, self.max_attempts)
+            except Exception as e:
+                logger.warning(f"Heartbeat jobs: {e}")
@@ -0,0 +1,114 @@
+# src/manifest.py
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class IngestionManifest:
+    """Manifest local : fichier -> hash contenu, mtime, taille, chunk ids
+
+    Permet la ré-ingestion incrémentale (fichiers inchangés ignorés) et le
+    nettoyage des chunks orphelins des fichiers modifiés ou supprimés.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            self.files = {}
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.files = data.get("files", {}) if data.get("version") == MANIFEST_VERSION else {}
+        except Exception as e:
+            logger.warning(f"Manifest illisible {self.path}, ignoré: {e}")
+            self.files = {}
+
+    def save(self):
+        """Ecriture atomique (tmp + rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Copie de l'état courant (restaurée si un rebuild échoue)"""
+        self.load()
+        return json.loads(json.dumps(self.files))
+
+    def restore(self, snapshot: Dict[str, Dict]):
+        self.files = snapshot
+        self.save()
+
+    def clear(self):
+        self.files = {}
+        self.save()
+
+    def get(self, file_path: Path) -> Optional[Dict]:
+        return self.files.get(str(file_path))
+
+    def changed_hash(self, file_path: Path) -> Optional[str]:
+        """Hash du contenu si le fichier est nouveau ou modifié, None sinon
+
+        mtime + taille identiques suffisent ; sinon on compare le hash
+        (un fichier re-uploadé à l'identique reste inchangé).
+        """
+        entry = self.get(file_path)
+        if entry is not None:
+            stat = file_path.stat()
+            if entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                return None
+
+        content_hash = file_hash(file_path)
+        if entry is not None and entry["hash"] == content_hash:
+            self.touch(file_path)
+            return None
+        return content_hash
+
+    def update(self, file_path: Path, content_hash: str, chunk_ids: List[str], created_at: str):
+        stat = file_path.stat()
+        self.files[str(file_path)] = {
+            "hash": content_hash,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "chunk_ids": chunk_ids,
+            "created_at": created_at
+        }
+
+    def touch(self, file_path: Path):
+        """Met à jour mtime/taille d'un fichier au contenu inchangé"""
+        entry = self.get(file_path)
+        if entry is not None:
+            stat = file_path.stat()
+            entry["mtime"] = stat.st_mtime
+            entry["size"] = stat.st_size
+
+    def remove(self, file_path: str) -> List[str]:
+        """Retire un fichier, retourne ses chunk ids"""
+        entry = self.files.pop(str(file_path), None)
+        return entry["chunk_ids"] if entry else []
+
+    def paths_under(self, directory: Path) -> List[str]:
+        prefix = str(directory).rstrip(os.sep) + os.sep
+        return [p for p in self.files if p.startswith(prefix)]
+
+
+def file_hash(file_path: Path, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 du contenu, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,95 @@
+# src/metrics.py
+from contextlib import nullcontext
+from typing import Optional, Sequence, Tuple
+import os
+
+from .config import MetricsConfig
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+ENABLED = prometheus_client is not None and MetricsConfig().enabled
+
+# Secondes : de la requête de recherche au parsing d'un gros fichier
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+BYTES_BUCKETS = tuple(2 ** n for n in range(12, 26, 2))  # 4 Ko .. 32 Mo
+
+
+class _NullMetric:
+    """Métrique sans effet (prometheus_client absent ou METRICS_ENABLED=false)"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def time(self):
+        return nullcontext()
+
+
+def _histogram(name: str, documentation: str, labels: Sequence[str] = (),
+               buckets: Tuple = LATENCY_BUCKETS):
+    if not ENABLED:
+        return _NullMetric()
+    return prometheus_client.Histogram(name, documentation, labels, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labels: Sequence[str] = ()):
+    if not ENABLED:
+        return _NullMetric()
+    return prometheus_client.Counter(name, documentation, labels)
+
+
+# Ingestion : parse/chunk (process de parsing), embedding, bulk
+PARSE_SECONDS = _histogram("docvector_ingest_parse_seconds", "Parsing time per file", ["parser"])
+CHUNK_SECONDS = _histogram("docvector_ingest_chunk_seconds", "Chunking time per file", ["parser"])
+FILES = _counter("docvector_ingest_files_total", "Files parsed", ["parser", "status"])
+CHUNKS = _counter("docvector_ingest_chunks_total", "Chunks produced", ["parser"])
+STAGE_SECONDS = _counter("docvector_ingest_stage_seconds_total",
+                         "Pipeline time per stage (parse wait, embed, index backpressure, indexer)", ["stage"])
+EMBED_BATCH_SECONDS = _histogram("docvector_embed_batch_seconds", "Encode time per ingestion batch")
+EMBED_BATCH_SIZE = _histogram("docvector_embed_batch_size", "Texts per ingestion encode batch",
+                              buckets=SIZE_BUCKETS)
+BULK_SECONDS = _histogram("docvector_bulk_request_seconds", "Bulk request latency")
+BULK_BYTES = _histogram("docvector_bulk_request_bytes", "Bulk request payload size", buckets=BYTES_BUCKETS)
+BULK_DOCUMENTS = _histogram("docvector_bulk_request_documents", "Documents per bulk request",
+                            buckets=SIZE_BUCKETS)
+BULK_RESULTS = _counter("docvector_bulk_documents_total",
+                        "Bulk document outcomes (indexed, rejected = retried, failed = dead-letter)", ["result"])
+
+# Recherche : embedding de la requête, aller-retour OpenSearch, fusion, sérialisation
+SEARCH_SECONDS = _histogram("docvector_search_stage_seconds", "Search time per stage", ["stage"])
+SEARCH_TOOK_SECONDS = _histogram("docvector_search_opensearch_took_seconds",
+                                 "Server-side search time reported by OpenSearch (took)", ["leg"])
+SEARCHES = _counter("docvector_search_requests_total", "Searches", ["fusion", "cache"])
+
+
+def render() -> Optional[Tuple[bytes, str]]:
+    """(payload, content type) de /metrics, None si les métriques sont désactivées
+
+    Sous gunicorn, PROMETHEUS_MULTIPROC_DIR est posé par le master avant le
+    fork : chaque process écrit ses valeurs dans ce répertoire et la page
+    agrège tous les workers (et les process de parsing).
+    """
+    if not ENABLED:
+        return None
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """A appeler par le master quand un worker meurt (hook child_exit)"""
+    if ENABLED and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
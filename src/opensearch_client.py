@@ -1,9 +1,19 @@
 # src/opensearch_client.py - VERSION COMPLÈTE FINALE
 from opensearchpy import OpenSearch, helpers
-from typing import List, Dict
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import json
 import logging
+import os
+import re
 import urllib3
 
+from .bulk_indexer import BulkIndexer
+from .query_cache import IndexGeneration
+from .vector_encoding import check_encoding, encode_vectors, knn_field
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
@@ -27,7 +37,13 @@ class OpenSearchClient:
             ssl_show_warn=False,
             timeout=30
         )
+        # Alias lu par les recherches ; les écritures vont à write_index
+        # (l'alias, ou le nouvel index physique pendant un rebuild)
         self.index_name = config.index_name
+        self.write_index = config.index_name
+        self.vector_encoding = check_encoding(config.vector_encoding)
+        # Incrémentée à chaque écriture : invalide les caches de recherche
+        self.generation = IndexGeneration(Path(config.generation_path))
         
         # Test connexion obligatoire
         try:
@@ -42,10 +58,14 @@ class OpenSearchClient:
             raise
         
     def create_index(self, dimension: int = 384):
-        """Crée l'index avec mapping k-NN"""
+        """Crée l'index avec mapping k-NN
+
+        L'index physique est versionné ({alias}_v1) et exposé sous l'alias
+        INDEX_NAME ; les reconstructions passent par rebuild_index().
+        """
         logger.info(f"Create index {self.index_name}...")
         
-        # Vérifier existence
+        # Vérifier existence (alias ou ancien index non versionné)
         try:
             exists = self.client.indices.exists(index=self.index_name)
             if exists:
@@ -54,30 +74,43 @@ class OpenSearchClient:
         except Exception as e:
             logger.debug(f"Erreur vérification existence: {e}")
         
+        physical_index = self._versioned_name(self._next_version())
+        index_body = self._index_body(dimension)
+        index_body["aliases"] = {self.index_name: {}}
+        
+        # Création
+        try:
+            self.client.indices.create(index=physical_index, body=index_body)
+            self.generation.bump()
+            logger.info(f"✅ Index {physical_index} créé (alias {self.index_name})")
+            return True
+        except Exception as e:
+            if "resource_already_exists_exception" in str(e):
+                logger.info(f"ℹ️  Index {self.index_name} existe déjà")
+                return False
+            else:
+                logger.error(f"❌ Erreur création index: {e}")
+                raise
+    
+    def _index_body(self, dimension: int) -> dict:
         # Mapping complet
         index_body = {
             "settings": {
                 "index": {
                     "knn": True,
                     "knn.algo_param.ef_search": 100,
-                    "number_of_shards": 2,
-                    "number_of_replicas": 1
+                    "number_of_shards": self.config.number_of_shards,
+                    "number_of_replicas": self.config.number_of_replicas
                 }
             },
             "mappings": {
                 "properties": {
                     "chunk_id": {"type": "keyword"},
                     "content": {"type": "text", "analyzer": "standard"},
-                    "embedding": {
-                        "type": "knn_vector",
-                        "dimension": dimension,
-                        "method": {
-                            "name": "hnsw",
-                            "space_type": "cosinesimil",
-                            "engine": "faiss",
-                            "parameters": {"ef_construction": 128, "m": 16}
-                        }
-                    },
+                    "embedding": knn_field(
+                        dimension, self.vector_encoding,
+                        m=self.config.knn_m, ef_construction=self.config.knn_ef_construction
+                    ),
                     "metadata": {
                         "properties": {
                             "source_type": {"type": "keyword"},
@@ -87,42 +120,216 @@ class OpenSearchClient:
                             "language": {"type": "keyword"},
                             "parent_doc_id": {"type": "keyword"},
                             "chunk_index": {"type": "integer"},
+                            "page": {"type": "integer"},
+                            "page_start": {"type": "integer"},
+                            "page_end": {"type": "integer"},
+                            "symbol": {"type": "keyword"},
+                            "symbol_type": {"type": "keyword"},
+                            "line_start": {"type": "integer"},
+                            "line_end": {"type": "integer"},
+                            "sheet": {"type": "keyword"},
+                            "row_start": {"type": "integer"},
+                            "row_end": {"type": "integer"},
                             "total_chunks": {"type": "integer"},
                             "created_at": {"type": "date"}
                         }
                     },
+                    # Chunk dédupliqué : tous les emplacements de son contenu
+                    "sources": {
+                        "properties": {
+                            "file_path": {"type": "keyword"},
+                            "file_name": {"type": "keyword"},
+                            "position": {"type": "integer"}
+                        }
+                    },
                     "title": {"type": "text"},
                     "summary": {"type": "text"}
                 }
             }
         }
+        if not self.config.vectors_in_source:
+            # Graphe k-NN et doc values suffisent à la recherche : pas de copie
+            # JSON du vecteur (disque, merges, snapshots)
+            index_body["mappings"]["_source"] = {"excludes": ["embedding"]}
         
-        # Création
-        try:
-            self.client.indices.create(index=self.index_name, body=index_body)
-            logger.info(f"✅ Index {self.index_name} créé")
-            return True
-        except Exception as e:
-            if "resource_already_exists_exception" in str(e):
-                logger.info(f"ℹ️  Index {self.index_name} existe déjà")
-                return False
-            else:
-                logger.error(f"❌ Erreur création index: {e}")
-                raise
+        return index_body
+    
+    def encode_vectors(self, vectors) -> List[List]:
+        """Embeddings (n, d) au format de l'index (float arrondi, fp16, byte)"""
+        return encode_vectors(vectors, self.vector_encoding, self.config.vector_decimals)
     
     def bulk_index(self, documents: List[Dict]) -> dict:
         """Indexation bulk"""
+        return self.stream_index(documents)
+    
+    def stream_index(self, documents: Iterable[Dict],
+                     on_result: Optional[Callable[[bool, str], None]] = None) -> dict:
+        """Indexation bulk en streaming (parallel_bulk, retry des rejets, dead-letter)
+
+        Sur l'index recherché, le flux est un bloc d'écriture de la génération
+        (cache de résultats suspendu) refermé après un refresh : aucun
+        résultat mis en cache ne peut précéder la visibilité des documents.
+        Pendant un rebuild, le nouvel index n'est pas encore recherché : la
+        bascule d'alias incrémente la génération.
+        """
+        indexer = BulkIndexer(
+            self.client, self.write_index,
+            thread_count=self.config.bulk_threads,
+            chunk_size=self.config.bulk_chunk_size,
+            max_chunk_bytes=self.config.bulk_max_bytes,
+            max_retries=self.config.bulk_max_retries,
+            initial_backoff=self.config.bulk_initial_backoff,
+            max_backoff=self.config.bulk_max_backoff,
+            dead_letter_path=Path(self.config.dead_letter_path)
+        )
+        if self.write_index != self.index_name:
+            return indexer.index(documents, on_result=on_result)
+        with self.generation.writing():
+            try:
+                return indexer.index(documents, on_result=on_result)
+            finally:
+                self._refresh_write_index()
+    
+    def delete_documents(self, chunk_ids: List[str]) -> int:
+        """Suppression bulk par chunk_id (ids absents ignorés)"""
+        if not chunk_ids:
+            return 0
+        
         actions = [
-            {"_index": self.index_name, "_id": doc["chunk_id"], "_source": doc}
-            for doc in documents
+            {"_op_type": "delete", "_index": self.write_index, "_id": chunk_id}
+            for chunk_id in chunk_ids
         ]
         
-        success, failed = helpers.bulk(
-            self.client, actions, raise_on_error=False, raise_on_exception=False
+        with self.generation.writing():
+            try:
+                success, failed = helpers.bulk(
+                    self.client, actions, raise_on_error=False, raise_on_exception=False
+                )
+            finally:
+                self._refresh_write_index()
+        
+        logger.info(f"Supprimés: {success}, Absents/échecs: {len(failed)}")
+        return success
+    
+    def _refresh_write_index(self):
+        """Rend les écritures visibles avant la fin du bloc d'écriture"""
+        try:
+            self.client.indices.refresh(index=self.write_index)
+        except Exception as e:
+            logger.warning(f"⚠️  Refresh {self.write_index} impossible: {e}")
+    
+    @contextmanager
+    def bulk_load_mode(self, max_num_segments: int = 1, warmup: bool = False):
+        """Chargement massif : refresh désactivé et 0 replica pendant le bloc
+
+        Les settings d'origine sont restaurés en sortie ; si le chargement a
+        réussi, les segments sont fusionnés et le graphe k-NN optionnellement
+        préchargé en mémoire (les premières requêtes ne paient pas le
+        chargement à froid).
+        """
+        index = self.write_index
+        current = self.client.indices.get_settings(index=index)
+        # Alias : la réponse est indexée par le nom physique
+        index_settings = next(iter(current.values()))["settings"]["index"]
+        original = {
+            "refresh_interval": index_settings.get("refresh_interval"),
+            "number_of_replicas": index_settings.get("number_of_replicas", self.config.number_of_replicas)
+        }
+        
+        logger.info(f"Mode bulk-load sur {index} (refresh -1, 0 replica)")
+        self.client.indices.put_settings(
+            index=index, body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}}
         )
         
-        logger.info(f"Indexés: {success}, Échecs: {len(failed)}")
-        return {"success": success, "failed": len(failed)}
+        try:
+            yield
+        finally:
+            # refresh_interval null = valeur par défaut du cluster
+            self.client.indices.put_settings(index=index, body={"index": original})
+            self.client.indices.refresh(index=index)
+            self.generation.bump()
+            logger.info(f"Settings restaurés sur {index}: {original}")
+        
+        logger.info(f"Force merge {index} ({max_num_segments} segment(s) max)...")
+        self.client.indices.forcemerge(
+            index=index, max_num_segments=max_num_segments, request_timeout=3600
+        )
+        if warmup:
+            self.warmup_knn(index)
+    
+    def warmup_knn(self, index: Optional[str] = None):
+        """Charge les graphes k-NN de l'index en mémoire native"""
+        index = index or self.index_name
+        logger.info(f"Warmup k-NN {index}...")
+        try:
+            response = self.client.transport.perform_request(
+                "GET", f"/_plugins/_knn/warmup/{index}", params={"request_timeout": 3600}
+            )
+            logger.info(f"Warmup k-NN terminé: {response.get('_shards', response)}")
+        except Exception as e:
+            logger.warning(f"⚠️  Warmup k-NN impossible: {e}")
+    
+    def iter_documents(self, index: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict]:
+        """Documents de l'index sans leur vecteur (contenu, metadata) : base du reindex"""
+        for hit in helpers.scan(
+            self.client, index=index or self.index_name, size=batch_size,
+            query={"query": {"match_all": {}}}, _source_excludes=["embedding"]
+        ):
+            yield {**hit["_source"], "chunk_id": hit["_source"].get("chunk_id", hit["_id"])}
+    
+    def get_documents(self, chunk_ids: List[str], batch_size: int = 500) -> Dict[str, Dict]:
+        """Documents de l'index d'écriture par chunk_id, sans vecteur (ids absents ignorés)"""
+        found = {}
+        for i in range(0, len(chunk_ids), batch_size):
+            response = self.client.mget(
+                index=self.write_index, body={"ids": chunk_ids[i:i + batch_size]},
+                _source_excludes=["embedding"]
+            )
+            for doc in response["docs"]:
+                if doc.get("found"):
+                    found[doc["_id"]] = doc["_source"]
+        return found
+    
+    def index_sizes(self) -> List[Dict]:
+        """Taille de chaque index physique (versions gardées incluses) et son profil de stockage"""
+        names = self.physical_indices()
+        if not self._is_alias() and self.client.indices.exists(index=self.index_name):
+            names.append(self.index_name)
+        return self._index_profiles(names)
+    
+    def _index_profiles(self, names: List[str]) -> List[Dict]:
+        if not names:
+            return []
+        
+        current = self.current_index()
+        stats = self.client.indices.stats(index=",".join(names), metric="docs,store")["indices"]
+        mappings = self.client.indices.get_mapping(index=",".join(names))
+        
+        sizes = []
+        for name in names:
+            primaries = stats.get(name, {}).get("primaries", {})
+            mapping = mappings.get(name, {}).get("mappings", {})
+            size_bytes = primaries.get("store", {}).get("size_in_bytes", 0)
+            documents = primaries.get("docs", {}).get("count", 0)
+            sizes.append({
+                "index": name,
+                "current": name == current,
+                "documents": documents,
+                "size_mb": round(size_bytes / 1024 / 1024, 2),
+                "bytes_per_document": round(size_bytes / documents) if documents else None,
+                "vectors_in_source": "embedding" not in mapping.get("_source", {}).get("excludes", []),
+                "vector_encoding": self._mapping_encoding(mapping)
+            })
+        return sizes
+    
+    def _mapping_encoding(self, mapping: Dict) -> Optional[str]:
+        field = mapping.get("properties", {}).get("embedding")
+        if field is None:
+            return None
+        if field.get("data_type") == "byte":
+            return "byte"
+        encoder = field.get("method", {}).get("parameters", {}).get("encoder", {})
+        return encoder.get("parameters", {}).get("type", "float") if encoder.get("name") == "sq" else "float"
     
     def count_documents(self) -> int:
         """Compte documents dans l'index"""
@@ -135,12 +342,144 @@ class OpenSearchClient:
             return 0
     
     def delete_index(self):
-        """Supprime l'index"""
+        """Supprime l'index (toutes les versions physiques derrière l'alias)"""
         try:
-            if self.client.indices.exists(index=self.index_name):
-                self.client.indices.delete(index=self.index_name)
-                logger.info(f"✅ Index {self.index_name} supprimé")
+            targets = self.physical_indices()
+            if self.client.indices.exists(index=self.index_name) and not self._is_alias():
+                # Ancien index non versionné
+                targets.append(self.index_name)
+            
+            if targets:
+                self.client.indices.delete(index=",".join(targets))
+                self.generation.bump()
+                logger.info(f"✅ Index {self.index_name} supprimé ({', '.join(targets)})")
             else:
                 logger.info(f"ℹ️  Index {self.index_name} n'existe pas")
         except Exception as e:
-            logger.warning(f"⚠️  Erreur suppression: {e}")
\ No newline at end of file
+            logger.warning(f"⚠️  Erreur suppression: {e}")
+    
+    @contextmanager
+    def rebuild_index(self, dimension: int = 384, keep_versions: Optional[int] = None):
+        """Reconstruction sans coupure : nouvel index physique derrière l'alias
+
+        Pendant le bloc, les écritures vont au nouvel index ({alias}_v{n+1})
+        et les recherches continuent sur l'ancien via l'alias. En sortie,
+        l'alias bascule atomiquement puis les anciennes versions sont
+        supprimées (sauf les keep_versions plus récentes). En cas d'erreur,
+        le nouvel index est supprimé et l'alias reste inchangé.
+        """
+        if keep_versions is None:
+            keep_versions = self.config.keep_versions
+        new_index = self._versioned_name(self._next_version())
+        self.client.indices.create(index=new_index, body=self._index_body(dimension))
+        logger.info(f"Rebuild: écriture dans {new_index}, recherches sur {self.index_name}")
+        
+        self.write_index = new_index
+        try:
+            yield new_index
+        except BaseException:
+            logger.error(f"Rebuild annulé, suppression de {new_index}")
+            self.client.indices.delete(index=new_index, ignore_unavailable=True)
+            raise
+        finally:
+            self.write_index = self.index_name
+        
+        self.client.indices.refresh(index=new_index)
+        # Index sortant mesuré avant la bascule : supprimé juste après par
+        # défaut (INDEX_KEEP_VERSIONS=0)
+        before = self._profile_of(self.current_index())
+        self._swap_alias(new_index)
+        self.generation.bump()
+        self._cleanup_versions(new_index, keep_versions)
+        self._record_rebuild(before, self._profile_of(new_index))
+    
+    def _profile_of(self, name: Optional[str]) -> Optional[Dict]:
+        try:
+            profiles = self._index_profiles([name]) if name else []
+        except Exception as e:
+            logger.warning(f"⚠️  Taille de {name} indisponible: {e}")
+            return None
+        return profiles[0] if profiles else None
+    
+    def _record_rebuild(self, before: Optional[Dict], after: Optional[Dict]):
+        """Comparaison avant/après du dernier rebuild, lue par /api/status"""
+        # "current" n'a plus de sens une fois l'alias basculé
+        before, after = [
+            {k: v for k, v in profile.items() if k != "current"} if profile else None
+            for profile in (before, after)
+        ]
+        report = {"rebuilt_at": datetime.now().isoformat(), "before": before, "after": after}
+        if before and after and before["size_mb"]:
+            report["size_ratio"] = round(after["size_mb"] / before["size_mb"], 3)
+        path = Path(self.config.rebuild_report_path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            tmp_path.write_text(json.dumps(report, indent=2))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️  Rapport de rebuild non écrit: {e}")
+    
+    def last_rebuild(self) -> Optional[Dict]:
+        """Tailles de l'index sortant et du nouvel index au dernier rebuild"""
+        try:
+            return json.loads(Path(self.config.rebuild_report_path).read_text())
+        except (OSError, ValueError):
+            return None
+    
+    def physical_indices(self) -> List[str]:
+        """Versions physiques {alias}_v{n}, de la plus ancienne à la plus récente"""
+        try:
+            indices = self.client.indices.get(index=f"{self.index_name}_v*")
+        except Exception:
+            return []
+        return sorted(
+            (name for name in indices if self._version_of(name) is not None),
+            key=self._version_of
+        )
+    
+    def current_index(self) -> Optional[str]:
+        """Index physique derrière l'alias"""
+        if not self._is_alias():
+            return self.index_name if self.client.indices.exists(index=self.index_name) else None
+        return next(iter(self.client.indices.get_alias(name=self.index_name)))
+    
+    def _swap_alias(self, new_index: str):
+        actions = []
+        if self._is_alias():
+            for old_index in self.client.indices.get_alias(name=self.index_name):
+                actions.append({"remove": {"index": old_index, "alias": self.index_name}})
+        elif self.client.indices.exists(index=self.index_name):
+            # Migration : l'ancien index porte le nom de l'alias
+            actions.append({"remove_index": {"index": self.index_name}})
+        actions.append({"add": {"index": new_index, "alias": self.index_name}})
+        
+        self.client.indices.update_aliases(body={"actions": actions})
+        logger.info(f"✅ Alias {self.index_name} -> {new_index}")
+    
+    def _cleanup_versions(self, current: str, keep_versions: int):
+        old_versions = [name for name in self.physical_indices() if name != current]
+        to_delete = old_versions[:max(0, len(old_versions) - keep_versions)]
+        for name in to_delete:
+            try:
+                self.client.indices.delete(index=name)
+                logger.info(f"Ancienne version {name} supprimée")
+            except Exception as e:
+                logger.warning(f"⚠️  Suppression {name} impossible: {e}")
+    
+    def _is_alias(self) -> bool:
+        try:
+            return bool(self.client.indices.exists_alias(name=self.index_name))
+        except Exception:
+            return False
+    
+    def _next_version(self) -> int:
+        versions = [self._version_of(name) for name in self.physical_indices()]
+        return max(versions, default=0) + 1
+    
+    def _versioned_name(self, version: int) -> str:
+        return f"{self.index_name}_v{version}"
+    
+    def _version_of(self, name: str) -> Optional[int]:
+        match = re.fullmatch(rf"{re.escape(self.index_name)}_v(\d+)", name)
+        return int(match.group(1)) if match else None
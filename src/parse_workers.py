@@ -0,0 +1,137 @@
+# src/parse_workers.py
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import time
+
+from . import metrics
+from .parsers.document_parser import DocumentParser
+from .parsers.markdown_parser import MarkdownParser
+from .parsers.code_parser import CodeParser
+from .parsers.devops_parser import DevOpsParser
+from .parsers.pdf_extractor import PdfExtractor
+from .chunker import TextChunker
+from .config import IngestionConfig
+
+logger = logging.getLogger(__name__)
+
+# Evénements émis par l'étage parse/chunk
+EVENT_CHUNKS = "chunks"
+EVENT_DONE = "done"
+EVENT_ERROR = "error"
+EVENT_EXIT = "exit"
+# Marqueur du process principal : relu, tous les événements émis par un
+# worker mort (payload = n° du worker) ont été consommés
+EVENT_CHECK = "check"
+
+
+def build_parsers(pdf_workers: Optional[int] = None) -> Dict:
+    """Mapping type -> parser (pdf_workers : taille du pool d'extraction PDF,
+    PDF_WORKERS par défaut)"""
+    config = IngestionConfig()
+    pdf_extractor = PdfExtractor(
+        workers=pdf_workers or config.pdf_workers,
+        pages_per_task=config.pdf_pages_per_task,
+        parallel_min_pages=config.pdf_parallel_min_pages,
+        page_budget=config.pdf_page_budget or None
+    )
+    return {
+        'document': DocumentParser(pdf_extractor),
+        'markdown': MarkdownParser(),
+        'code': CodeParser(),
+        'devops': DevOpsParser()
+    }
+
+
+def pdf_workers_per_process(parse_workers: int) -> int:
+    """PDF_WORKERS réparti entre les process de parsing (au moins 1 chacun)
+
+    Chaque process de parsing a son propre pool d'extraction : sans
+    partage, INGEST_WORKERS x PDF_WORKERS process se disputeraient le CPU.
+    """
+    return max(1, IngestionConfig().pdf_workers // max(1, parse_workers))
+
+
+def close_parsers(parsers: Dict):
+    """Arrête le pool d'extraction PDF (recréé à la demande)"""
+    parsers['document'].pdf_extractor.close()
+
+
+def get_parser(parsers: Dict, file_path: Path):
+    """Sélection parser selon extension"""
+    ext = file_path.suffix.lower()
+
+    if ext in ['.md', '.markdown']:
+        return parsers['markdown']
+    elif ext in ['.py', '.java', '.js', '.ts', '.go', '.rb', '.php', '.c', '.cpp', '.cs']:
+        return parsers['code']
+    elif ext in ['.yml', '.yaml'] or 'jenkinsfile' in file_path.name.lower():
+        return parsers['devops']
+    else:
+        return parsers['document']
+
+
+def parse_and_chunk(parsers: Dict, chunker: TextChunker, file_path: Path) -> Iterator[Dict]:
+    """Parse + chunk un fichier, chunk par chunk (temps de parsing et de chunking mesurés)"""
+    parser = get_parser(parsers, file_path)
+    parser_name = type(parser).__name__
+    parse_seconds = chunk_seconds = 0.0
+    chunk_count = 0
+
+    raw_chunks = parser.iter_parse(file_path)
+    while True:
+        started = time.perf_counter()
+        raw_chunk = next(raw_chunks, None)
+        parse_seconds += time.perf_counter() - started
+        if raw_chunk is None:
+            break
+
+        started = time.perf_counter()
+        if "rows" in raw_chunk:
+            chunks = chunker.chunk_rows(raw_chunk["prefix"], raw_chunk["rows"], raw_chunk["metadata"])
+        else:
+            chunks = chunker.chunk_text(raw_chunk["text"], raw_chunk["metadata"])
+        chunk_seconds += time.perf_counter() - started
+        chunk_count += len(chunks)
+        yield from chunks
+
+    metrics.PARSE_SECONDS.labels(parser_name).observe(parse_seconds)
+    metrics.CHUNK_SECONDS.labels(parser_name).observe(chunk_seconds)
+    metrics.FILES.labels(parser_name, "ok").inc()
+    metrics.CHUNKS.labels(parser_name).inc(chunk_count)
+
+
+def iter_file_events(parsers: Dict, chunker: TextChunker, file_path: Path,
+                     slice_size: int) -> Iterator[Tuple[str, str, object]]:
+    """Evénements (type, fichier, payload) pour un fichier, chunks par paquets de slice_size"""
+    key = str(file_path)
+    buffer: List[Dict] = []
+    try:
+        for chunk in parse_and_chunk(parsers, chunker, file_path):
+            buffer.append(chunk)
+            if len(buffer) >= slice_size:
+                yield EVENT_CHUNKS, key, buffer
+                buffer = []
+        if buffer:
+            yield EVENT_CHUNKS, key, buffer
+        yield EVENT_DONE, key, None
+    except Exception as e:
+        metrics.FILES.labels(type(get_parser(parsers, file_path)).__name__, "error").inc()
+        yield EVENT_ERROR, key, str(e)
+
+
+def parse_worker(file_queue, event_queue, chunker: TextChunker, slice_size: int,
+                 pdf_workers: int = 1, worker_id: int = 0):
+    """Process worker: lit des chemins, émet les chunks dans la queue bornée"""
+    parsers = build_parsers(pdf_workers)
+
+    while True:
+        file_path = file_queue.get()
+        if file_path is None:
+            break
+
+        for event in iter_file_events(parsers, chunker, Path(file_path), slice_size):
+            event_queue.put(event)
+
+    close_parsers(parsers)
+    event_queue.put((EVENT_EXIT, None, worker_id))
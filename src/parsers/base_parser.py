@@ -1,13 +1,21 @@
 # src/parsers/base_parser.py
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 from pathlib import Path
 
+# Taille max (caractères) d'un bloc de texte émis par un parser : la mémoire
+# dépend de cette borne, pas de la taille du fichier
+STREAM_BLOCK_CHARS = 256 * 1024
+
 class BaseParser(ABC):
     @abstractmethod
+    def iter_parse(self, file_path: Path) -> Iterator[Dict]:
+        """Génère les chunks bruts avec metadata, au fil de la lecture"""
+        pass
+    
     def parse(self, file_path: Path) -> List[Dict]:
         """Retourne liste de chunks avec metadata"""
-        pass
+        return list(self.iter_parse(file_path))
     
     def get_file_metadata(self, file_path: Path) -> Dict:
         """Metadata communes"""
@@ -16,4 +24,23 @@ class BaseParser(ABC):
             "file_name": file_path.name,
             "file_extension": file_path.suffix.lstrip('.'),
             "file_size": file_path.stat().st_size
-        }
\ No newline at end of file
+        }
+    
+    def iter_lines(self, file_path: Path, block_chars: int = STREAM_BLOCK_CHARS) -> Iterator[str]:
+        """Lignes du fichier, une ligne géante étant découpée à block_chars"""
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            yield from iter(lambda: f.readline(block_chars), '')
+    
+    def iter_blocks(self, lines: Iterable[str], block_chars: int = STREAM_BLOCK_CHARS) -> Iterator[str]:
+        """Regroupe des lignes en blocs d'au plus ~block_chars, coupés entre deux lignes"""
+        block = []
+        size = 0
+        for line in lines:
+            if size + len(line) > block_chars and block:
+                yield "".join(block)
+                block = []
+                size = 0
+            block.append(line)
+            size += len(line)
+        if block:
+            yield "".join(block)
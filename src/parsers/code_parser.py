@@ -1,71 +1,306 @@
 # src/parsers/code_parser.py
 from .base_parser import BaseParser
+from bisect import bisect_right
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
+import ast
 import re
 
+# Langages à accolades découpés par structure (classes, fonctions)
+BRACE_LANGUAGES = {'java', 'javascript', 'typescript', 'go', 'php', 'c', 'cpp', 'csharp'}
+
+CONTAINER_PATTERN = re.compile(
+    r'\b(class|interface|enum|struct|namespace|trait|record|object)\s+([A-Za-z_$][\w$]*)'
+)
+# En-tête terminé par une liste de paramètres : fonction, même si le type de
+# retour contient un mot-clé de conteneur ("struct node *make(void)", "object Get()")
+SIGNATURE_END = re.compile(r'\)\s*(?:const|noexcept|override|final|throws[\w\s,.]*)?\s*$')
+CALL_PATTERN = re.compile(r'([A-Za-z_$][\w$]*)\s*\(')
+ASSIGN_PATTERN = re.compile(r'([A-Za-z_$][\w$]*)\s*[:=]\s*(?:async\s+)?(?:function\b|\()')
+NOT_NAMES = {
+    'if', 'for', 'while', 'switch', 'catch', 'return', 'function', 'func', 'new',
+    'typeof', 'sizeof', 'synchronized', 'using', 'lock', 'foreach', 'with', 'else', 'do', 'try',
+    'async', 'await'
+}
+# Bloc de contrôle (if (ready(x)) {...}) : pas une fonction
+CONTROL_PATTERN = re.compile(
+    r'^\s*(?:else\b|if|for|foreach|while|switch|catch|try|finally|do|with|lock|using|synchronized)\b'
+)
+# Liste de paramètres fermée, suivie au plus d'un type de retour ou de "=>"
+PARAMETERS_END = re.compile(r'\)[^()]*$')
+
 class CodeParser(BaseParser):
-    def parse(self, file_path: Path) -> List[Dict]:
+    def iter_parse(self, file_path: Path) -> Iterator[Dict]:
         ext = file_path.suffix.lower()
-        
+
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             content = f.read()
-        
+
         language = self._detect_language(ext)
-        
-        # Parse simple par fonction/classe
-        if ext == '.py':
-            chunks = self._parse_python(content, file_path)
-        elif ext in ['.java', '.js', '.ts']:
-            chunks = self._parse_generic_code(content, file_path, language)
+        metadata = {
+            **self.get_file_metadata(file_path),
+            "source_type": "code",
+            "language": language
+        }
+
+        # Découpage structurel : fonctions, classes, méthodes (sources de
+        # taille raisonnable : lus en entier)
+        if language == 'python':
+            chunks = self._parse_python(content, metadata)
+        elif language in BRACE_LANGUAGES:
+            chunks = self._parse_braces(content, metadata)
         else:
-            chunks = [{
-                "text": content,
-                "metadata": {
-                    **self.get_file_metadata(file_path),
-                    "source_type": "code",
-                    "language": language
-                }
-            }]
-        
+            chunks = []
+
+        return iter(chunks or [{"text": content, "metadata": metadata}])
+
+    def _parse_python(self, content: str, metadata: Dict) -> List[Dict]:
+        """Chunks ast : fonctions, classes (hors méthodes), méthodes et code de module"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return []
+
+        lines = content.splitlines(keepends=True)
+        chunks = []
+        covered = set()
+
+        def visit(nodes, prefix: str):
+            for node in nodes:
+                if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    continue
+                # Décorateurs inclus dans le chunk
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                end = node.end_lineno
+                name = f"{prefix}{node.name}"
+
+                if isinstance(node, ast.ClassDef):
+                    members = [n for n in node.body
+                               if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+                    member_lines = set()
+                    for member in members:
+                        member_start = min([member.lineno] + [d.lineno for d in member.decorator_list])
+                        member_lines.update(range(member_start, member.end_lineno + 1))
+                    # Classe sans ses méthodes : signature, docstring, attributs
+                    own = [n for n in range(start, end + 1) if n not in member_lines]
+                    chunks.append(self._line_chunk(lines, own, metadata, name, "class"))
+                    covered.update(own)
+                    visit(members, f"{name}.")
+                else:
+                    symbol_type = "method" if prefix and prefix[:-1] in classes else "function"
+                    chunks.append(self._line_chunk(lines, range(start, end + 1), metadata, name, symbol_type))
+                    covered.update(range(start, end + 1))
+
+        classes = set(self._python_classes(tree.body, ""))
+        visit(tree.body, "")
+
+        # Code de module restant (imports, constantes, main), par blocs contigus
+        module_chunks = []
+        run: List[int] = []
+        for number in range(1, len(lines) + 1):
+            if number in covered:
+                if run:
+                    module_chunks.append(run)
+                run = []
+            else:
+                run.append(number)
+        if run:
+            module_chunks.append(run)
+
+        for run in module_chunks:
+            chunk = self._line_chunk(lines, run, metadata, None, "module")
+            if chunk["text"].strip():
+                chunks.append(chunk)
+
+        chunks = [chunk for chunk in chunks if chunk["text"].strip()]
+        chunks.sort(key=lambda chunk: chunk["metadata"]["line_start"])
         return chunks
-    
-    def _parse_python(self, content: str, file_path: Path) -> List[Dict]:
-        # Regex simple pour détecter fonctions/classes
-        pattern = r'((?:class|def)\s+\w+.*?(?=\n(?:class|def)\s|\Z))'
-        matches = re.findall(pattern, content, re.DOTALL)
-        
+
+    def _python_classes(self, nodes, prefix: str) -> Iterator[str]:
+        for node in nodes:
+            if isinstance(node, ast.ClassDef):
+                name = f"{prefix}{node.name}"
+                yield name
+                yield from self._python_classes(node.body, f"{name}.")
+
+    def _line_chunk(self, lines: List[str], numbers, metadata: Dict,
+                    symbol: Optional[str], symbol_type: str) -> Dict:
+        numbers = list(numbers)
+        chunk_metadata = {
+            **metadata,
+            "symbol_type": symbol_type,
+            "line_start": numbers[0],
+            "line_end": numbers[-1]
+        }
+        if symbol:
+            chunk_metadata["symbol"] = symbol
+        return {
+            "text": "".join(lines[n - 1] for n in numbers if n <= len(lines)).strip("\n"),
+            "metadata": chunk_metadata
+        }
+
+    def _parse_braces(self, content: str, metadata: Dict) -> List[Dict]:
+        """Découpage par accolades (hors chaînes et commentaires)
+
+        Unités : fonctions et blocs ; les classes/interfaces sont redécoupées
+        en membres, récursivement (classes internes), avec un nom qualifié
+        (Ns.Outer.Inner.method). Les namespaces sont transparents : en-tête
+        rangé avec les déclarations, contenu découpé comme le niveau fichier.
+        Les déclarations consécutives (imports, champs) sont regroupées.
+        """
+        events, matches = self._scan_braces(content)
+        if events is None:
+            return []
+
+        line_starts = [0] + [m.end() for m in re.finditer(r'\n', content)]
         chunks = []
-        for match in matches:
-            if match.strip():
-                chunks.append({
-                    "text": match.strip(),
-                    "metadata": {
-                        **self.get_file_metadata(file_path),
-                        "source_type": "code",
-                        "language": "python"
-                    }
-                })
-        
-        return chunks if chunks else [{
-            "text": content,
-            "metadata": {
-                **self.get_file_metadata(file_path),
-                "source_type": "code",
-                "language": "python"
-            }
-        }]
-    
-    def _parse_generic_code(self, content: str, file_path: Path, language: str) -> List[Dict]:
-        return [{
-            "text": content,
-            "metadata": {
-                **self.get_file_metadata(file_path),
-                "source_type": "code",
-                "language": language
+
+        def line_of(offset: int) -> int:
+            return bisect_right(line_starts, offset)
+
+        def emit(start: int, end: int, symbol: Optional[str], symbol_type: str):
+            text = content[start:end].strip()
+            if not text:
+                return
+            # Lignes du texte effectif (sans les blancs de tête)
+            start += len(content[start:end]) - len(content[start:end].lstrip())
+            chunk_metadata = {
+                **metadata,
+                "symbol_type": symbol_type,
+                "line_start": line_of(start),
+                "line_end": line_of(start + len(text) - 1)
             }
-        }]
-    
+            if symbol:
+                chunk_metadata["symbol"] = symbol
+            chunks.append({"text": text, "metadata": chunk_metadata})
+
+        def split(start: int, end: int, depth: int, prefix: str, in_class: bool):
+            declarations: Optional[Tuple[int, int]] = None
+            unit_start = start
+
+            def flush():
+                nonlocal declarations
+                if declarations is not None:
+                    emit(declarations[0], declarations[1], prefix[:-1] or None,
+                         "declarations")
+                    declarations = None
+
+            for pos, char, event_depth in events:
+                if pos < unit_start or pos >= end or event_depth != depth:
+                    continue
+
+                if char == ';':
+                    unit_end = pos + 1
+                    declarations = (declarations[0] if declarations else unit_start, unit_end)
+                    unit_start = unit_end
+                    continue
+                if char != '{':
+                    continue
+
+                close = matches.get(pos)
+                if close is None or close >= end:
+                    break
+                unit_end = close + 1
+                # "};" ou "}," terminant une expression
+                trailing = re.match(r'[ \t]*[;,]', content[unit_end:end])
+                if trailing:
+                    unit_end += trailing.end()
+
+                header = self._clean_header(content[unit_start:pos])
+                container = CONTAINER_PATTERN.search(header)
+                if container and SIGNATURE_END.search(header):
+                    container = None
+                name = self._function_name(header)
+
+                if container:
+                    name = f"{prefix}{container.group(2)}"
+                    if container.group(1) == "namespace":
+                        # En-tête gardé avec les déclarations qui le précèdent
+                        declarations = (declarations[0] if declarations else unit_start, pos + 1)
+                        flush()
+                        split(pos + 1, close, depth + 1, f"{name}.", False)
+                    else:
+                        flush()
+                        # En-tête de la classe, puis ses membres
+                        emit(unit_start, pos + 1, name, "class")
+                        split(pos + 1, close, depth + 1, f"{name}.", True)
+                elif name:
+                    flush()
+                    emit(unit_start, unit_end, f"{prefix}{name}",
+                         "method" if in_class else "function")
+                else:
+                    # Bloc anonyme (initialiseur, littéral) : avec les déclarations
+                    declarations = (declarations[0] if declarations else unit_start, unit_end)
+                unit_start = unit_end
+
+            if content[unit_start:end].strip():
+                declarations = (declarations[0] if declarations else unit_start, end)
+            flush()
+
+        split(0, len(content), 0, "", False)
+        return chunks
+
+    def _scan_braces(self, content: str):
+        """Accolades et ';' hors chaînes/commentaires : (events, ouvrante -> fermante)"""
+        events = []
+        matches = {}
+        stack = []
+        i = 0
+        n = len(content)
+
+        while i < n:
+            char = content[i]
+            if char == '/' and content.startswith('//', i):
+                newline = content.find('\n', i)
+                i = n if newline == -1 else newline
+                continue
+            if char == '/' and content.startswith('/*', i):
+                close = content.find('*/', i + 2)
+                i = n if close == -1 else close + 2
+                continue
+            if char in '"\'`':
+                i += 1
+                while i < n and content[i] != char:
+                    if content[i] == '\\':
+                        i += 1
+                    elif content[i] == '\n' and char != '`':
+                        break  # chaîne non fermée : on ne propage pas l'erreur
+                    i += 1
+                i += 1
+                continue
+            if char == '{':
+                events.append((i, char, len(stack)))
+                stack.append(i)
+            elif char == '}':
+                if not stack:
+                    return None, None
+                matches[stack.pop()] = i
+            elif char == ';':
+                events.append((i, char, len(stack)))
+            i += 1
+
+        if stack:
+            return None, None
+        return events, matches
+
+    def _clean_header(self, header: str) -> str:
+        # Commentaires et annotations/attributs ne portent pas le nom
+        header = re.sub(r'//[^\n]*|/\*.*?\*/', ' ', header, flags=re.DOTALL)
+        header = re.sub(r'@\w+(?:\([^)]*\))?', ' ', header)
+        return header
+
+    def _function_name(self, header: str) -> Optional[str]:
+        # "const handler = async (req, res) =>" : le nom est celui affecté
+        match = ASSIGN_PATTERN.search(header)
+        if match:
+            return match.group(1)
+        if CONTROL_PATTERN.match(header) or not PARAMETERS_END.search(header):
+            return None
+        for match in CALL_PATTERN.finditer(header):
+            if match.group(1) not in NOT_NAMES:
+                return match.group(1)
+        return None
+
     def _detect_language(self, ext: str) -> str:
         lang_map = {
             '.py': 'python',
@@ -79,4 +314,4 @@ class CodeParser(BaseParser):
             '.cpp': 'cpp',
             '.cs': 'csharp'
         }
-        return lang_map.get(ext, 'unknown')
\ No newline at end of file
+        return lang_map.get(ext, 'unknown')
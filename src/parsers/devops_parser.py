@@ -1,16 +1,16 @@
 # src/parsers/devops_parser.py
 from .base_parser import BaseParser
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, List
 import yaml
 import re
 
 class DevOpsParser(BaseParser):
-    def parse(self, file_path: Path) -> List[Dict]:
+    def iter_parse(self, file_path: Path) -> Iterator[Dict]:
         if 'jenkinsfile' in file_path.name.lower():
-            return self._parse_jenkinsfile(file_path)
+            return iter(self._parse_jenkinsfile(file_path))
         elif file_path.suffix in ['.yml', '.yaml']:
-            return self._parse_yaml(file_path)
+            return iter(self._parse_yaml(file_path))
         else:
             return self._parse_text(file_path)
     
@@ -61,14 +61,14 @@ class DevOpsParser(BaseParser):
             }
         }]
     
-    def _parse_text(self, file_path: Path) -> List[Dict]:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+    def _parse_text(self, file_path: Path) -> Iterator[Dict]:
+        metadata = self.get_file_metadata(file_path)
         
-        return [{
-            "text": content,
-            "metadata": {
-                **self.get_file_metadata(file_path),
-                "source_type": "devops"
-            }
-        }]
\ No newline at end of file
+        for block in self.iter_blocks(self.iter_lines(file_path)):
+            yield {
+                "text": block,
+                "metadata": {
+                    **metadata,
+                    "source_type": "devops"
+                }
+            }
\ No newline at end of file
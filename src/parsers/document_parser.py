@@ -1,85 +1,210 @@
 # src/parsers/document_parser.py
 from .base_parser import BaseParser
+from .pdf_extractor import PdfExtractor
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import docx
-import PyPDF2
 import openpyxl
 
+# Groupes de lignes Excel, redécoupés par le chunker au budget du modèle
+# (chunk_rows : en-tête répété, plage de lignes propre à chaque chunk)
+EXCEL_ROWS_PER_CHUNK = 20
+EXCEL_MAX_CHARS = 1500
+
+# Pages PDF consécutives regroupées jusqu'à ce volume de texte (pages
+# quasi vides des manuels scannés)
+PDF_GROUP_MIN_CHARS = 1000
+
 class DocumentParser(BaseParser):
-    def parse(self, file_path: Path) -> List[Dict]:
+    def __init__(self, pdf_extractor: Optional[PdfExtractor] = None):
+        self.pdf_extractor = pdf_extractor or PdfExtractor(workers=1)
+    
+    def iter_parse(self, file_path: Path) -> Iterator[Dict]:
         ext = file_path.suffix.lower()
         
         if ext == '.pdf':
             return self._parse_pdf(file_path)
         elif ext in ['.docx', '.doc']:
             return self._parse_docx(file_path)
-        elif ext in ['.xlsx', '.xls']:
+        elif ext == '.xls':
+            return self._parse_xls(file_path)
+        elif ext == '.xlsx':
             return self._parse_excel(file_path)
         else:
             return self._parse_text(file_path)
     
-    def _parse_pdf(self, file_path: Path) -> List[Dict]:
-        chunks = []
-        with open(file_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            for page_num, page in enumerate(reader.pages):
-                text = page.extract_text()
-                if text.strip():
-                    chunks.append({
-                        "text": text,
-                        "metadata": {
-                            **self.get_file_metadata(file_path),
-                            "source_type": "document",
-                            "page": page_num + 1
-                        }
-                    })
-        return chunks
+    def _parse_pdf(self, file_path: Path) -> Iterator[Dict]:
+        """Pages extraites en parallèle, chunks de pages consécutives (page_start/page_end)"""
+        metadata = self.get_file_metadata(file_path)
+        texts: List[str] = []
+        pages: List[int] = []
+        size = 0
+        
+        def make_chunk():
+            return {
+                "text": "\n".join(texts),
+                "metadata": {
+                    **metadata,
+                    "source_type": "document",
+                    "page": pages[0],
+                    "page_start": pages[0],
+                    "page_end": pages[-1]
+                }
+            }
+        
+        for result in self.pdf_extractor.iter_pages(file_path):
+            if not result.text.strip():
+                continue
+            texts.append(result.text)
+            pages.append(result.page)
+            size += len(result.text)
+            if size >= PDF_GROUP_MIN_CHARS:
+                yield make_chunk()
+                texts, pages, size = [], [], 0
+        
+        if texts:
+            yield make_chunk()
     
-    def _parse_docx(self, file_path: Path) -> List[Dict]:
+    def _parse_docx(self, file_path: Path) -> Iterator[Dict]:
         doc = docx.Document(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+        metadata = self.get_file_metadata(file_path)
+        paragraphs = (para.text + "\n" for para in doc.paragraphs if para.text.strip())
         
-        return [{
-            "text": text,
-            "metadata": {
-                **self.get_file_metadata(file_path),
-                "source_type": "document"
+        for block in self.iter_blocks(paragraphs):
+            yield {
+                "text": block.rstrip("\n"),
+                "metadata": {
+                    **metadata,
+                    "source_type": "document"
+                }
             }
-        }]
     
-    def _parse_excel(self, file_path: Path) -> List[Dict]:
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        chunks = []
+    def _parse_excel(self, file_path: Path) -> Iterator[Dict]:
+        # read_only : lignes lues au fil de l'eau, pas de classeur complet en mémoire
+        wb = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
+        metadata = self.get_file_metadata(file_path)
         
-        for sheet_name in wb.sheetnames:
-            sheet = wb[sheet_name]
-            rows = []
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join([str(cell) for cell in row if cell is not None])
-                if row_text.strip():
-                    rows.append(row_text)
-            
-            if rows:
-                chunks.append({
-                    "text": "\n".join(rows),
-                    "metadata": {
-                        **self.get_file_metadata(file_path),
-                        "source_type": "document",
-                        "sheet": sheet_name
-                    }
-                })
+        try:
+            for sheet_name in wb.sheetnames:
+                sheet = wb[sheet_name]
+                # Dimensions souvent fausses dans les exports : lecture jusqu'à la fin
+                sheet.reset_dimensions()
+                rows = (
+                    (row_number, self._format_cells(row))
+                    for row_number, row in enumerate(sheet.iter_rows(values_only=True), 1)
+                )
+                yield from self._row_groups(rows, sheet_name, metadata)
+        finally:
+            wb.close()
+    
+    def _parse_xls(self, file_path: Path) -> Iterator[Dict]:
+        """Ancien format binaire .xls (non lu par openpyxl) via xlrd"""
+        try:
+            import xlrd
+        except ImportError:
+            raise ImportError("Lecture .xls : installer xlrd (pip install xlrd)")
         
-        return chunks
+        # on_demand : feuilles chargées une par une
+        wb = xlrd.open_workbook(str(file_path), on_demand=True)
+        metadata = self.get_file_metadata(file_path)
+        
+        try:
+            for sheet_name in wb.sheet_names():
+                sheet = wb.sheet_by_name(sheet_name)
+                rows = (
+                    (row_idx + 1, self._format_cells(
+                        self._xls_value(cell, wb.datemode, xlrd) for cell in sheet.row(row_idx)
+                    ))
+                    for row_idx in range(sheet.nrows)
+                )
+                yield from self._row_groups(rows, sheet_name, metadata)
+                wb.unload_sheet(sheet_name)
+        finally:
+            wb.release_resources()
+    
+    def _xls_value(self, cell, datemode: int, xlrd):
+        # Dates stockées en numéro de série dans le format binaire
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            try:
+                return xlrd.xldate_as_datetime(cell.value, datemode)
+            except Exception:
+                return cell.value
+        return cell.value
     
-    def _parse_text(self, file_path: Path) -> List[Dict]:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            text = f.read()
+    def _format_cells(self, row: Iterable) -> List[str]:
+        # Cellules vides conservées (alignement avec l'en-tête), fin de ligne vide retirée
+        cells = [
+            "" if cell is None
+            else str(int(cell)) if isinstance(cell, float) and cell.is_integer()
+            else str(cell).strip()
+            for cell in row
+        ]
+        while cells and not cells[-1]:
+            cells.pop()
+        return cells
+    
+    def _row_groups(self, rows: Iterable[Tuple[int, List[str]]], sheet_name: str,
+                    metadata: Dict) -> Iterator[Dict]:
+        """Chunks de lignes consécutives, précédés de l'en-tête de la feuille"""
+        header = None
+        header_row = 0
+        group: List[Tuple[int, str]] = []
+        size = 0
+        row_start = row_end = 0
         
-        return [{
-            "text": text,
-            "metadata": {
-                **self.get_file_metadata(file_path),
-                "source_type": "document"
+        def make_chunk():
+            lines = [f"Sheet: {sheet_name}"]
+            if header:
+                lines.append(header)
+            return {
+                "text": "\n".join(lines + [line for _, line in group]),
+                # Lignes numérotées et préfixe : découpage par le chunker
+                "prefix": lines,
+                "rows": list(group),
+                "metadata": {
+                    **metadata,
+                    "source_type": "document",
+                    "sheet": sheet_name,
+                    "row_start": row_start,
+                    "row_end": row_end
+                }
             }
-        }]
\ No newline at end of file
+        
+        for row_number, cells in rows:
+            if not any(cells):
+                continue
+            line = " | ".join(cells)
+            if header is None:
+                # Première ligne non vide = en-tête de colonnes
+                header = line
+                header_row = row_number
+                continue
+            
+            if group and (len(group) >= EXCEL_ROWS_PER_CHUNK or size + len(line) > EXCEL_MAX_CHARS):
+                yield make_chunk()
+                group = []
+                size = 0
+            if not group:
+                row_start = row_number
+            group.append((row_number, line))
+            size += len(line)
+            row_end = row_number
+        
+        if group:
+            yield make_chunk()
+        elif header is not None:
+            # Feuille réduite à une ligne
+            row_start = row_end = header_row
+            yield make_chunk()
+    
+    def _parse_text(self, file_path: Path) -> Iterator[Dict]:
+        metadata = self.get_file_metadata(file_path)
+        
+        for block in self.iter_blocks(self.iter_lines(file_path)):
+            yield {
+                "text": block,
+                "metadata": {
+                    **metadata,
+                    "source_type": "document"
+                }
+            }
\ No newline at end of file
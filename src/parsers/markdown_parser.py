@@ -1,37 +1,51 @@
 # src/parsers/markdown_parser.py
-from .base_parser import BaseParser
+from .base_parser import BaseParser, STREAM_BLOCK_CHARS
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, List
 import re
 
+HEADER_PATTERN = re.compile(r'#+\s')
+
 class MarkdownParser(BaseParser):
-    def parse(self, file_path: Path) -> List[Dict]:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+    def iter_parse(self, file_path: Path) -> Iterator[Dict]:
+        metadata = self.get_file_metadata(file_path)
         
-        # Split par headers
-        sections = re.split(r'\n(?=#+\s)', content)
-        chunks = []
+        # Split par headers, ligne par ligne ; une section trop longue est
+        # émise en plusieurs blocs avec le même titre
+        section: List[str] = []
+        size = 0
+        title = ""
         
-        for section in sections:
-            if section.strip():
+        for line in self.iter_lines(file_path):
+            if HEADER_PATTERN.match(line) or size + len(line) > STREAM_BLOCK_CHARS:
+                chunk = self._section_chunk(section, title, metadata)
+                if chunk:
+                    yield chunk
+                section = []
+                size = 0
+            
+            if HEADER_PATTERN.match(line):
                 # Extraire titre
-                title_match = re.match(r'#+\s+(.+)', section)
-                title = title_match.group(1) if title_match else ""
-                
-                chunks.append({
-                    "text": section.strip(),
-                    "metadata": {
-                        **self.get_file_metadata(file_path),
-                        "source_type": "markdown",
-                        "title": title
-                    }
-                })
+                title_match = re.match(r'#+\s+(.+)', line)
+                title = title_match.group(1).strip() if title_match else ""
+            
+            section.append(line)
+            size += len(line)
+        
+        chunk = self._section_chunk(section, title, metadata)
+        if chunk:
+            yield chunk
+    
+    def _section_chunk(self, lines: List[str], title: str, metadata: Dict):
+        text = "".join(lines).strip()
+        if not text:
+            return None
         
-        return chunks if chunks else [{
-            "text": content,
+        return {
+            "text": text,
             "metadata": {
-                **self.get_file_metadata(file_path),
-                "source_type": "markdown"
+                **metadata,
+                "source_type": "markdown",
+                "title": title
             }
-        }]
\ No newline at end of file
+        }
@@ -0,0 +1,148 @@
+# src/parsers/pdf_extractor.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+
+class PageResult(NamedTuple):
+    page: int            # numéro de page (1-based)
+    text: str
+    seconds: float       # temps d'extraction
+    skipped: bool        # budget dépassé : texte ignoré
+
+
+class PageTimeout(BaseException):
+    # BaseException : PyPDF2 intercepte les Exception pendant le parsing
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise PageTimeout()
+
+
+def extract_page_range(file_path: str, first: int, last: int,
+                       page_budget: Optional[float] = None) -> List[PageResult]:
+    """Extrait les pages [first, last) (0-based) d'un PDF
+
+    Avec un budget, une page trop longue est interrompue par SIGALRM
+    (setitimer) quand on est dans le thread principal ; sinon elle est
+    mesurée puis ignorée après coup.
+    """
+    use_timer = (
+        page_budget is not None and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    previous_handler = signal.signal(signal.SIGALRM, _on_alarm) if use_timer else None
+
+    results = []
+    try:
+        with open(file_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            for page_idx in range(first, min(last, len(reader.pages))):
+                start = time.perf_counter()
+                skipped = False
+                try:
+                    if use_timer:
+                        signal.setitimer(signal.ITIMER_REAL, page_budget)
+                    try:
+                        text = reader.pages[page_idx].extract_text() or ""
+                    finally:
+                        if use_timer:
+                            signal.setitimer(signal.ITIMER_REAL, 0)
+                except PageTimeout:
+                    # Y compris une alarme tombée juste avant l'arrêt du timer
+                    text, skipped = "", True
+
+                seconds = time.perf_counter() - start
+                if page_budget is not None and seconds > page_budget:
+                    text, skipped = "", True
+                results.append(PageResult(page_idx + 1, text, seconds, skipped))
+    finally:
+        if use_timer:
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    return results
+
+
+class PdfExtractor:
+    """Extraction de texte PDF par plages de pages, en parallèle
+
+    Les gros PDF sont découpés en plages de pages_per_task pages traitées
+    par un pool de process ; les résultats sont rendus dans l'ordre des
+    pages, avec au plus 2 plages en vol par worker (mémoire bornée).
+    """
+
+    def __init__(self, workers: int = 2, pages_per_task: int = 16,
+                 parallel_min_pages: int = 32, page_budget: Optional[float] = None):
+        self.workers = max(1, workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self.parallel_min_pages = parallel_min_pages
+        self.page_budget = page_budget
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def iter_pages(self, file_path: Path) -> Iterator[PageResult]:
+        with open(file_path, 'rb') as f:
+            page_count = len(PyPDF2.PdfReader(f).pages)
+
+        start = time.perf_counter()
+        stats = {"pages": 0, "skipped": [], "slowest": (0.0, 0)}
+
+        for result in self._iter_results(str(file_path), page_count):
+            stats["pages"] += 1
+            if result.skipped:
+                stats["skipped"].append(result.page)
+            stats["slowest"] = max(stats["slowest"], (result.seconds, result.page))
+            logger.debug(f"{file_path} page {result.page}: {result.seconds * 1000:.0f} ms")
+            yield result
+
+        slowest_seconds, slowest_page = stats["slowest"]
+        logger.info(
+            f"PDF {Path(file_path).name}: {stats['pages']} pages en {time.perf_counter() - start:.1f}s, "
+            f"page la plus lente {slowest_page} ({slowest_seconds:.2f}s)"
+            + (f", ignorées (budget {self.page_budget}s): {stats['skipped']}" if stats["skipped"] else "")
+        )
+
+    def _iter_results(self, file_path: str, page_count: int) -> Iterator[PageResult]:
+        if self.workers <= 1 or page_count < self.parallel_min_pages:
+            yield from extract_page_range(file_path, 0, page_count, self.page_budget)
+            return
+
+        executor = self._get_executor()
+        ranges = deque(range(0, page_count, self.pages_per_task))
+        in_flight = deque()
+
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < self.workers * 2:
+                    first = ranges.popleft()
+                    in_flight.append(executor.submit(
+                        extract_page_range, file_path, first, first + self.pages_per_task,
+                        self.page_budget
+                    ))
+                # Ordre des pages : on attend toujours la plus ancienne plage
+                yield from in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn : pas de fork d'un process qui a déjà chargé torch
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
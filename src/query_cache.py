@@ -0,0 +1,183 @@
+# src/query_cache.py
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import copy
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Cache mémoire LRU borné, entrées expirées après ttl secondes"""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+class IndexGeneration:
+    """Compteur de génération de l'index, partagé entre process via un fichier
+
+    Chaque écriture dans l'index (ingestion, suppression, rebuild) incrémente
+    la génération : les résultats mis en cache sous l'ancienne ne sont plus
+    servis. Pendant une écriture longue (writing()), les refresh exposent
+    des documents au fil de l'eau : aucun résultat n'est mis en cache tant
+    qu'un écrivain (de n'importe quel process) tient le verrou partagé.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._writers_path = self.path.with_name(f"{self.path.name}.writers")
+
+    def current(self) -> int:
+        try:
+            return int(self.path.read_text().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self) -> int:
+        # flock : lecture-incrément-écriture atomique entre process (API, CLI)
+        with self._lock, self._file_lock(self._lock_path, fcntl.LOCK_EX):
+            generation = self.current() + 1
+            tmp_path = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+            tmp_path.write_text(str(generation))
+            os.replace(tmp_path, self.path)
+        return generation
+
+    @contextmanager
+    def writing(self):
+        """Bloc d'écriture sur l'index recherché : génération incrémentée en
+        entrée et en sortie, cache de résultats suspendu entre les deux
+
+        L'appelant doit rendre ses écritures visibles (refresh) avant la
+        sortie du bloc.
+        """
+        with self._file_lock(self._writers_path, fcntl.LOCK_SH):
+            self.bump()
+            try:
+                yield
+            finally:
+                self.bump()
+
+    def write_in_progress(self) -> bool:
+        try:
+            fd = os.open(self._writers_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            # Fermer le descripteur libère aussi le verrou éventuellement pris
+            os.close(fd)
+        return False
+
+    @contextmanager
+    def _file_lock(self, path: Path, operation: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)
+
+
+class SearchCache:
+    """Cache à deux niveaux de /api/search
+
+    - texte de requête normalisé -> embedding (indépendant de l'index)
+    - (requête, top_k, filtres, options, génération) -> résultats
+    """
+
+    def __init__(self, generation: IndexGeneration, ttl: float = 300,
+                 max_embeddings: int = 10000, max_results: int = 1000):
+        self.generation = generation
+        self.embeddings = TTLCache(max_embeddings, ttl)
+        self.results = TTLCache(max_results, ttl)
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.split())
+
+    def embedding(self, query: str, compute: Callable[[str], List[float]]) -> List[float]:
+        key = self.normalize(query)
+        vector = self.embeddings.get(key)
+        if vector is None:
+            vector = compute(query)
+            self.embeddings.put(key, vector)
+        return vector
+
+    def result_key(self, query: str, **options) -> str:
+        return json.dumps(
+            [self.normalize(query), self.generation.current(), options],
+            sort_keys=True, default=str
+        )
+
+    def get_results(self, key: str) -> Optional[List[Dict]]:
+        results = self.results.get(key)
+        # Copie : l'appelant peut modifier sa liste sans toucher au cache
+        return copy.deepcopy(results) if results is not None else None
+
+    def put_results(self, key: str, results: List[Dict]):
+        # Ecriture en cours : les refresh rendent le résultat obsolète avant
+        # le prochain changement de génération
+        if self.generation.write_in_progress():
+            return
+        self.results.put(key, copy.deepcopy(results))
+
+    def stats(self) -> dict:
+        return {
+            "generation": self.generation.current(),
+            "embeddings": self.embeddings.stats(),
+            "results": self.results.stats()
+        }
@@ -0,0 +1,315 @@
+# src/search.py
+from typing import Dict, List, Optional
+import logging
+import time
+
+from . import metrics
+from .config import OpenSearchConfig
+from .query_cache import SearchCache
+from .vector_encoding import check_encoding, encode_vector
+
+logger = logging.getLogger(__name__)
+
+FUSION_METHODS = ("rrf", "minmax", "pipeline")
+
+# Filtres metadata exposés -> champ du mapping
+FILTER_FIELDS = {
+    "source_type": "metadata.source_type",
+    "language": "metadata.language",
+    "file_extension": "metadata.file_extension",
+}
+
+
+def build_filter(filters: Optional[Dict]) -> Optional[Dict]:
+    """Filtre bool à partir de {"source_type": "code", "language": ["python", "go"]}"""
+    clauses = []
+    for name, value in (filters or {}).items():
+        field = FILTER_FIELDS.get(name)
+        if field is None:
+            raise ValueError(f"Unsupported filter: {name}")
+        if value is None or value == "" or value == []:
+            continue
+
+        values = value if isinstance(value, list) else [value]
+        clauses.append({"terms": {field: values}})
+
+    return {"bool": {"filter": clauses}} if clauses else None
+
+
+def knn_query(vector: List[float], k: int, ef_search: Optional[int] = None,
+              filters: Optional[Dict] = None, field: str = "embedding") -> Dict:
+    """Requête k-NN native (graphe HNSW), filtre appliqué pendant la recherche ANN"""
+    params = {"vector": vector, "k": k}
+
+    filter_clause = build_filter(filters)
+    if filter_clause is not None:
+        params["filter"] = filter_clause
+    if ef_search:
+        params["method_parameters"] = {"ef_search": ef_search}
+
+    return {"knn": {field: params}}
+
+
+def keyword_query(query: str, filters: Optional[Dict] = None) -> Dict:
+    """Requête BM25 sur le contenu et le titre, mêmes filtres que le k-NN"""
+    bool_query = {
+        "must": {
+            "multi_match": {
+                "query": query,
+                "fields": ["content^2", "title"],
+                "type": "best_fields"
+            }
+        }
+    }
+
+    filter_clause = build_filter(filters)
+    if filter_clause is not None:
+        bool_query["filter"] = filter_clause["bool"]["filter"]
+
+    return {"bool": bool_query}
+
+
+
+class HybridSearcher:
+    """Recherche hybride k-NN + BM25
+
+    Les deux jambes sont des requêtes bornées envoyées en un seul aller-retour
+    msearch, puis fusionnées côté client : reciprocal rank fusion ("rrf") ou
+    normalisation min-max pondérée ("minmax"). "pipeline" délègue la fusion au
+    normalization-processor d'une search pipeline OpenSearch (query hybrid).
+    """
+
+    def __init__(self, client, index_name: str, embedder, fusion: str = "rrf",
+                 rrf_k: int = 60, vector_weight: float = 0.7, keyword_weight: float = 0.3,
+                 candidates: int = 50, ef_search: Optional[int] = 100,
+                 pipeline_name: str = "docvector-hybrid", cache: Optional[SearchCache] = None,
+                 vector_encoding: str = "float", vector_decimals: int = 0):
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unsupported fusion: {fusion}")
+        self.client = client
+        self.index_name = index_name
+        self.embedder = embedder
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.vector_weight = vector_weight
+        self.keyword_weight = keyword_weight
+        self.candidates = candidates
+        self.ef_search = ef_search
+        self.pipeline_name = pipeline_name
+        self.cache = cache
+        # Requête quantifiée comme les documents de l'index
+        self.vector_encoding = check_encoding(vector_encoding)
+        self.vector_decimals = vector_decimals
+        self._pipeline_ready = False
+
+    @classmethod
+    def from_config(cls, client, index_name: str, embedder, config,
+                    generation=None, os_config: Optional[OpenSearchConfig] = None) -> "HybridSearcher":
+        os_config = os_config or OpenSearchConfig()
+        cache = None
+        if config.cache_enabled and generation is not None:
+            cache = SearchCache(generation, ttl=config.cache_ttl,
+                                max_embeddings=config.cache_max_embeddings,
+                                max_results=config.cache_max_results)
+        return cls(
+            client, index_name, embedder,
+            fusion=config.fusion,
+            rrf_k=config.rrf_k,
+            vector_weight=config.vector_weight,
+            keyword_weight=config.keyword_weight,
+            candidates=config.candidates,
+            ef_search=config.ef_search,
+            pipeline_name=config.pipeline_name,
+            cache=cache,
+            vector_encoding=os_config.vector_encoding,
+            vector_decimals=os_config.vector_decimals
+        )
+
+    def search(self, query: str, top_k: int = 5, filters: Optional[Dict] = None,
+               ef_search: Optional[int] = None, fusion: Optional[str] = None,
+               source: Optional[List[str]] = None, highlight: Optional[Dict] = None) -> List[Dict]:
+        """Top-k fusionné : [{"id", "score", "source", "highlight", "vector_rank", "keyword_rank"}]"""
+        fusion = fusion or self.fusion
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unsupported fusion: {fusion}")
+        build_filter(filters)  # valide les filtres avant l'embedding
+        ef_search = ef_search or self.ef_search
+        source = source or ["content", "metadata", "title", "sources"]
+
+        if self.cache is None:
+            metrics.SEARCHES.labels(fusion, "off").inc()
+            return self._search(query, self._embed(query), top_k, filters,
+                                ef_search, fusion, source, highlight)
+
+        # Clé calculée avant la recherche : une écriture concurrente change la
+        # génération et le résultat stocké ne sera jamais relu
+        key = self.cache.result_key(query, top_k=top_k, filters=filters or {},
+                                    ef_search=ef_search, fusion=fusion,
+                                    source=source, highlight=highlight)
+        results = self.cache.get_results(key)
+        metrics.SEARCHES.labels(fusion, "miss" if results is None else "hit").inc()
+        if results is None:
+            vector = self.cache.embedding(query, self._embed)
+            results = self._search(query, vector, top_k, filters, ef_search, fusion, source, highlight)
+            self.cache.put_results(key, results)
+        return results
+
+    def _embed(self, query: str) -> List[float]:
+        with metrics.SEARCH_SECONDS.labels("embed").time():
+            return encode_vector(self.embedder.encode(query), self.vector_encoding, self.vector_decimals)
+
+    def cache_stats(self) -> Optional[dict]:
+        return self.cache.stats() if self.cache is not None else None
+
+    def _search(self, query: str, vector: List[float], top_k: int, filters: Optional[Dict],
+                ef_search: Optional[int], fusion: str, source: List[str],
+                highlight: Optional[Dict]) -> List[Dict]:
+        if fusion == "pipeline":
+            return self._search_pipeline(query, vector, top_k, filters, ef_search, source, highlight)
+
+        # Jambes bornées : assez de candidats pour que la fusion ait du sens
+        size = max(top_k, self.candidates)
+        vector_body = {
+            "size": size,
+            "query": knn_query(vector, k=size, ef_search=ef_search, filters=filters),
+            "_source": source
+        }
+        keyword_body = {
+            "size": size,
+            "query": keyword_query(query, filters),
+            "_source": source
+        }
+        if highlight:
+            vector_body["highlight"] = highlight
+            keyword_body["highlight"] = highlight
+
+        with metrics.SEARCH_SECONDS.labels("opensearch").time():
+            response = self.client.msearch(body=[
+                {"index": self.index_name}, vector_body,
+                {"index": self.index_name}, keyword_body
+            ])
+        vector_hits, keyword_hits = [self._hits(r) for r in response["responses"]]
+        for leg, leg_response in zip(("vector", "keyword"), response["responses"]):
+            self._observe_took(leg, leg_response)
+
+        started = time.perf_counter()
+        if fusion == "rrf":
+            fused = self._fuse_rrf(vector_hits, keyword_hits)
+        else:
+            fused = self._fuse_minmax(vector_hits, keyword_hits)
+        metrics.SEARCH_SECONDS.labels("fusion").observe(time.perf_counter() - started)
+        return fused[:top_k]
+
+    def _observe_took(self, leg: str, response: Dict):
+        # took : temps côté cluster (ms), le reste de l'aller-retour est réseau/sérialisation
+        if "took" in response:
+            metrics.SEARCH_TOOK_SECONDS.labels(leg).observe(response["took"] / 1000)
+
+    def ensure_pipeline(self):
+        """Crée/met à jour la search pipeline de normalisation (plugin neural-search)"""
+        body = {
+            "description": "DocVector hybrid search: min-max normalization + weighted mean",
+            "phase_results_processors": [{
+                "normalization-processor": {
+                    "normalization": {"technique": "min_max"},
+                    "combination": {
+                        "technique": "arithmetic_mean",
+                        # Même ordre que les requêtes de la query hybrid
+                        "parameters": {"weights": [self.keyword_weight, self.vector_weight]}
+                    }
+                }
+            }]
+        }
+        self.client.transport.perform_request(
+            "PUT", f"/_search/pipeline/{self.pipeline_name}", body=body
+        )
+        self._pipeline_ready = True
+        logger.info(f"Search pipeline {self.pipeline_name} prête")
+
+    def _search_pipeline(self, query: str, vector: List[float], top_k: int, filters: Optional[Dict],
+                         ef_search: Optional[int], source: List[str],
+                         highlight: Optional[Dict]) -> List[Dict]:
+        if not self._pipeline_ready:
+            self.ensure_pipeline()
+
+        size = max(top_k, self.candidates)
+        body = {
+            "size": top_k,
+            "query": {
+                "hybrid": {
+                    "queries": [
+                        keyword_query(query, filters),
+                        knn_query(vector, k=size, ef_search=ef_search, filters=filters)
+                    ]
+                }
+            },
+            "_source": source
+        }
+        if highlight:
+            body["highlight"] = highlight
+
+        with metrics.SEARCH_SECONDS.labels("opensearch").time():
+            response = self.client.search(
+                index=self.index_name, body=body, params={"search_pipeline": self.pipeline_name}
+            )
+        self._observe_took("hybrid", response)
+        return [
+            {
+                "id": hit["_id"],
+                "score": hit["_score"],
+                "source": hit["_source"],
+                "highlight": hit.get("highlight", {}),
+                "vector_rank": None,
+                "keyword_rank": None
+            }
+            for hit in response["hits"]["hits"]
+        ]
+
+    def _hits(self, response: Dict) -> List[Dict]:
+        if "error" in response:
+            raise RuntimeError(f"Search error: {response['error']}")
+        return response["hits"]["hits"]
+
+    def _fuse_rrf(self, vector_hits: List[Dict], keyword_hits: List[Dict]) -> List[Dict]:
+        """score = somme des w / (rrf_k + rang), insensible aux échelles de score"""
+        fused = {}
+        for leg, hits, weight in (("vector", vector_hits, self.vector_weight),
+                                  ("keyword", keyword_hits, self.keyword_weight)):
+            for rank, hit in enumerate(hits, 1):
+                entry = self._entry(fused, hit)
+                entry["score"] += weight / (self.rrf_k + rank)
+                entry[f"{leg}_rank"] = rank
+
+        return sorted(fused.values(), key=lambda e: e["score"], reverse=True)
+
+    def _fuse_minmax(self, vector_hits: List[Dict], keyword_hits: List[Dict]) -> List[Dict]:
+        """Scores normalisés [0, 1] par jambe puis moyenne pondérée"""
+        fused = {}
+        for leg, hits, weight in (("vector", vector_hits, self.vector_weight),
+                                  ("keyword", keyword_hits, self.keyword_weight)):
+            if not hits:
+                continue
+            scores = [hit["_score"] for hit in hits]
+            low, high = min(scores), max(scores)
+            for rank, hit in enumerate(hits, 1):
+                normalized = (hit["_score"] - low) / (high - low) if high > low else 1.0
+                entry = self._entry(fused, hit)
+                entry["score"] += weight * normalized
+                entry[f"{leg}_rank"] = rank
+
+        return sorted(fused.values(), key=lambda e: e["score"], reverse=True)
+
+    def _entry(self, fused: Dict, hit: Dict) -> Dict:
+        entry = fused.get(hit["_id"])
+        if entry is None:
+            entry = fused[hit["_id"]] = {
+                "id": hit["_id"],
+                "score": 0.0,
+                "source": hit["_source"],
+                "highlight": {},
+                "vector_rank": None,
+                "keyword_rank": None
+            }
+        if hit.get("highlight"):
+            entry["highlight"] = hit["highlight"]
+        return entry
@@ -0,0 +1,65 @@
+# src/vector_encoding.py
+from typing import Dict, List, Optional
+import numpy as np
+
+# float : float32 (faiss) ; fp16 : quantification scalaire faiss (encoder sq,
+# mémoire / 2) ; byte : knn_vector data_type byte (lucene, mémoire / 4)
+VECTOR_ENCODINGS = ("float", "fp16", "byte")
+
+FP16_MAX = 65504.0
+
+# Décimales envoyées dans le JSON bulk : en dessous du bruit de stockage pour
+# des embeddings normalisés (float32 ~1e-8, fp16 ~5e-5 autour de 0.1)
+DEFAULT_DECIMALS = {"float": 7, "fp16": 4}
+
+
+def check_encoding(encoding: str) -> str:
+    if encoding not in VECTOR_ENCODINGS:
+        raise ValueError(f"Unsupported vector encoding: {encoding} (expected one of {', '.join(VECTOR_ENCODINGS)})")
+    return encoding
+
+
+def knn_field(dimension: int, encoding: str = "float", m: int = 16, ef_construction: int = 128) -> Dict:
+    """Mapping knn_vector (HNSW, cosinesimil) pour un encodage"""
+    parameters = {"ef_construction": ef_construction, "m": m}
+    engine = "faiss"
+    field = {"type": "knn_vector", "dimension": dimension}
+
+    if check_encoding(encoding) == "fp16":
+        parameters["encoder"] = {"name": "sq", "parameters": {"type": "fp16"}}
+    elif encoding == "byte":
+        # Vecteurs byte en cosinesimil : moteur lucene
+        field["data_type"] = "byte"
+        engine = "lucene"
+
+    field["method"] = {
+        "name": "hnsw",
+        "space_type": "cosinesimil",
+        "engine": engine,
+        "parameters": parameters
+    }
+    return field
+
+
+def encode_vectors(vectors, encoding: str = "float", decimals: Optional[int] = None) -> List[List]:
+    """Vecteurs (n, d) -> listes JSON compactes pour l'encodage de l'index
+
+    byte : chaque vecteur est mis à l'échelle sur [-127, 127] par son max
+    absolu ; le cosinus étant invariant par homothétie, le classement ne
+    dépend que de l'arrondi.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if check_encoding(encoding) == "byte":
+        peak = np.abs(vectors).max(axis=1, keepdims=True)
+        scaled = vectors * (127.0 / np.where(peak > 0, peak, 1.0))
+        return np.rint(scaled).astype(np.int8).tolist()
+
+    if encoding == "fp16":
+        vectors = np.clip(vectors, -FP16_MAX, FP16_MAX)
+    # float64 arrondi : repr JSON courte ("0.0312042" et non "0.031204223632812500")
+    return np.round(vectors.astype(np.float64), decimals or DEFAULT_DECIMALS[encoding]).tolist()
+
+
+def encode_vector(vector, encoding: str = "float", decimals: Optional[int] = None) -> List:
+    """Vecteur de requête, quantifié comme les documents"""
+    return encode_vectors([vector], encoding, decimals)[0]